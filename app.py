@@ -1,64 +1,152 @@
+import os
+import sys
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from analytics import Analytics, company_metrics, load_metrics
+from facts import FactTable, line_item_name
+from processed_store import store_dir, table_version
+
+# "store" reads the processed Parquet store; "database" reads the tables loaded by load_database.py
+DASHBOARD_SOURCE = os.environ.get("DASHBOARD_SOURCE", "store")
+DASHBOARD_COMPANY = "SCOM"
+
+DATA_TABLES = ["income", "analysis"]
+
+EXPENSE_COLUMNS = [
+    "Direct Costs (KShs M)",
+    "Operating Profit (KShs M)",
+    "Profit Before Tax (KShs M)",
+    "EBITDA (KShs M)",
+]
+MARGIN_COLUMNS = ["Gross Margin (%)", "Operating Margin (%)", "Net Margin (%)"]
+TREND_COLUMNS = ["Total Revenue (KShs M)", "Net Profit (KShs M)"]
+
+
+def data_version():
+    """Version stamp of every input table; a write to any of them invalidates the cache"""
+    return tuple(table_version(table) for table in DATA_TABLES)
+
+
+def build_dashboard(summary_df, income_df, analysis_df):
+    """Build every figure up front from the three dashboard frames"""
+    years = list(analysis_df["Fiscal Year"].unique())
+
+    # Revenue vs Net Profit Trend
+    trend_fig = px.line(
+        analysis_df,
+        x="Fiscal Year",
+        y=TREND_COLUMNS,
+        markers=True,
+        title="Revenue vs Net Profit"
+    )
+
+    # Expense Breakdown (Pie Chart), one per selectable year
+    expense_long = income_df.melt(
+        id_vars=["Fiscal Year"],
+        value_vars=EXPENSE_COLUMNS,
+        var_name="Expense Category",
+        value_name="Amount"
+    )
+    expense_figs = {}
+    for year in years:
+        expense_figs[year] = px.pie(
+            expense_long[expense_long["Fiscal Year"] == year],
+            names="Expense Category",
+            values="Amount",
+            title=f"Expenses in {year}"
+        )
+
+    # Financial Ratios
+    ratio_fig = None
+    if all(column in summary_df.columns for column in MARGIN_COLUMNS):
+        ratio_fig = px.bar(
+            summary_df,
+            x="Fiscal Year",
+            y=MARGIN_COLUMNS,
+            barmode="group",
+            title="Margins Over Time"
+        )
+
+    return {
+        "years": years,
+        "trend_fig": trend_fig,
+        "expense_figs": expense_figs,
+        "ratio_fig": ratio_fig,
+    }
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_dashboard(version):
+    """Read the charted columns of one company once per process and build the figures
+
+    Shared by all sessions; nothing returned here is mutated afterwards.
+    """
+    def read(table, columns=None):
+        items = None if columns is None else [line_item_name(c) for c in columns]
+        facts = FactTable.load(table, companies=[DASHBOARD_COMPANY], line_items=items)
+        return facts.wide(items, company=DASHBOARD_COMPANY)
+
+    # Margins come from the analytics cache the report and charts also use
+    summary_df = company_metrics(load_metrics(), DASHBOARD_COMPANY)
+    income_df = read("income", EXPENSE_COLUMNS)
+    analysis_df = read("analysis", TREND_COLUMNS)
+    return build_dashboard(summary_df, income_df, analysis_df)
+
+
+@st.cache_resource(show_spinner=False)
+def database_reader():
+    """One pooled engine, change watcher and query cache per process"""
+    from dashboard_data import QueryCache
+
+    return QueryCache()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_dashboard_from_database(version, _reader):
+    """Query the database once per data version and build the figures
+
+    `version` only moves when the database reports a commit, so reruns in
+    between cost no queries.
+    """
+    from dashboard_data import DASHBOARD_LINE_ITEMS, income_facts
+
+    facts = income_facts(_reader, DASHBOARD_COMPANY)
+    income_df = facts.wide(DASHBOARD_LINE_ITEMS, company=DASHBOARD_COMPANY)
+    summary_df = company_metrics(Analytics(facts).metrics(), DASHBOARD_COMPANY)
+    return build_dashboard(summary_df, income_df, income_df)
+
+
 st.set_page_config(page_title="Safaricom Financial Analysis", layout="wide")
 
 st.title("📊 Safaricom Financial Analysis Dashboard")
 
-# Load your processed CSVs
-summary_df = pd.read_csv("data/processed/safaricom_financial_summary.csv")
-income_df = pd.read_csv("data/processed/income_statement_summary.csv")
-analysis_df = pd.read_csv("data/processed/safaricom_3year_analysis.csv")
+# Load your processed data (cached until the files or the database change)
+if DASHBOARD_SOURCE == "database":
+    reader = database_reader()
+    dashboard = load_dashboard_from_database(reader.version, reader)
+else:
+    dashboard = load_dashboard(data_version())
 
 # Sidebar filters
 st.sidebar.header("Filters")
-year = st.sidebar.selectbox("Select Fiscal Year", analysis_df["Fiscal Year"].unique())
+year = st.sidebar.selectbox("Select Fiscal Year", dashboard["years"])
 
 # Revenue vs Net Profit Trend
 st.subheader("Revenue vs Net Profit (3-Year Trend)")
-fig1 = px.line(
-    analysis_df,
-    x="Fiscal Year",
-    y=["Total Revenue (KShs M)", "Net Profit (KShs M)"],
-    markers=True,
-    title="Revenue vs Net Profit"
-)
-st.plotly_chart(fig1, width="stretch")
+st.plotly_chart(dashboard["trend_fig"], width="stretch")
 
 # Expense Breakdown (Pie Chart)
 st.subheader(f"Expense Breakdown for {year}")
-year_data = income_df[income_df["Fiscal Year"] == year]
-
-# Melt the dataframe to long format for pie chart
-expense_data = year_data.melt(
-    id_vars=["Fiscal Year"],
-    value_vars=[
-        "Direct Costs (KShs M)",
-        "Operating Profit (KShs M)",
-        "Profit Before Tax (KShs M)",
-        "EBITDA (KShs M)"
-    ],
-    var_name="Expense Category",
-    value_name="Amount"
-)
-
-fig2 = px.pie(
-    expense_data,
-    names="Expense Category",
-    values="Amount",
-    title=f"Expenses in {year}"
-)
-st.plotly_chart(fig2, width="stretch")
+st.plotly_chart(dashboard["expense_figs"][year], width="stretch")
 
 # Financial Ratios
 st.subheader("Profitability Ratios")
-fig3 = px.bar(
-    summary_df,
-    x="Fiscal Year",
-    y=["Gross_Margin", "Operating_Margin", "Net_Margin"],
-    barmode="group",
-    title="Margins Over Time"
-)
-st.plotly_chart(fig3, width="stretch")
-
+if dashboard["ratio_fig"] is not None:
+    st.plotly_chart(dashboard["ratio_fig"], width="stretch")
+else:
+    source = "the database" if DASHBOARD_SOURCE == "database" else f"{store_dir}/summary"
+    st.info(f"Margin columns {', '.join(MARGIN_COLUMNS)} are not in {source} yet.")
@@ -56,7 +56,22 @@ CREATE TABLE IF NOT EXISTS financial_metrics (
     calculation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Periods whose statement lines changed since financial_metrics was last materialized
+CREATE TABLE IF NOT EXISTS metric_refresh (
+    period_id INTEGER PRIMARY KEY REFERENCES financial_periods(period_id),
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Natural keys used by the bulk loader's and the metrics materializer's upserts
+CREATE UNIQUE INDEX IF NOT EXISTS uq_companies_ticker ON companies(ticker);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_periods_company_year ON financial_periods(company_id, fiscal_year, report_type);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_income_line ON income_statement(period_id, line_item);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_balance_line ON balance_sheet(period_id, line_item);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cashflow_line ON cash_flow(period_id, line_item);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_metrics_period_name ON financial_metrics(period_id, metric_name);
+
 -- Create indexes for better query performance
+-- (dropped and rebuilt around large bulk loads)
 CREATE INDEX IF NOT EXISTS idx_income_period ON income_statement(period_id);
 CREATE INDEX IF NOT EXISTS idx_balance_period ON balance_sheet(period_id);
 CREATE INDEX IF NOT EXISTS idx_cashflow_period ON cash_flow(period_id);
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import facts
+import line_items
+import processed_store
+from facts import FactTable
+from tracing import span
+
+cache_dir = "data/cache/analytics"
+# Results kept on disk; the least recently used beyond this are deleted
+MAX_CACHED_RESULTS = 32
+
+# Tables the shared metrics are computed from; earlier tables win on shared facts
+DEFAULT_TABLES = ('analysis', 'income')
+
+# Margin -> line item it divides by Total Revenue
+MARGINS = {
+    'EBITDA Margin': 'EBITDA',
+    'Operating Margin': 'Operating Profit',
+    'Net Margin': 'Net Profit',
+}
+# Return -> (numerator, denominator); closing balances, once balance sheets are parsed
+RETURNS = {
+    'ROE': ('Net Profit', 'Total Equity'),
+    'ROA': ('Net Profit', 'Total Assets'),
+}
+
+# Part of every cache key, so editing the formulas here, how facts are read and
+# pivoted, or how line items are named invalidates cached results
+_digest = hashlib.sha256()
+for _source in (__file__, facts.__file__, line_items.__file__, processed_store.__file__):
+    with open(_source, 'rb') as _f:
+        _digest.update(_f.read())
+CODE_VERSION = _digest.hexdigest()[:16]
+
+
+def growth_column(line_item):
+    return f'{line_item} Growth (%)'
+
+
+def change_column(line_item):
+    return f'{line_item} Change (KShs M)'
+
+
+def cagr_column(line_item, window=None):
+    return f'{line_item} CAGR (%)' if window is None else f'{line_item} CAGR {window}Y (%)'
+
+
+def _at(panel, years):
+    """Value of each column of `panel` in that column's year of `years`"""
+    rows = panel.index.get_indexer(years.to_numpy())
+    values = panel.to_numpy()[np.where(rows >= 0, rows, 0), np.arange(panel.shape[1])]
+    return pd.Series(np.where(rows >= 0, values, np.nan), index=panel.columns)
+
+
+class Analytics:
+    """Derived metrics for every company and year of a FactTable at once
+
+    The facts are pivoted into one frame of consecutive fiscal years by
+    (line item, company) columns. Every metric is then a whole-frame
+    operation: growth over n years is a division by the frame shifted n rows,
+    so missing years give NaN instead of comparing non-adjacent years.
+    """
+
+    def __init__(self, facts):
+        data = facts.data.droplevel('statement')
+        data = data[~data.index.duplicated()]
+        cube = data.unstack(['line_item', 'company'])
+        cube.columns = cube.columns.set_levels([level.astype(str) for level in cube.columns.levels])
+        if len(cube):
+            cube = cube.reindex(range(int(cube.index.min()), int(cube.index.max()) + 1))
+        self.facts = facts
+        self.cube = cube.rename_axis(index='fiscal_year')
+        self.companies = sorted(set(cube.columns.get_level_values('company')))
+
+    def item(self, line_item):
+        """Fiscal years by companies for one line item (all NaN if it has no facts)"""
+        if line_item in self.cube.columns.get_level_values('line_item'):
+            return self.cube[line_item].reindex(columns=self.companies)
+        return pd.DataFrame(np.nan, index=self.cube.index, columns=self.companies)
+
+    def _shifted(self, periods):
+        """Cube values `periods` years earlier, as an array"""
+        values = self.cube.to_numpy()
+        shifted = np.full_like(values, np.nan)
+        if periods < len(values):
+            shifted[periods:] = values[:len(values) - periods]
+        return shifted
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.cube.index, columns=self.cube.columns)
+
+    def growth(self, periods=1):
+        """Percentage change over `periods` years of every line item of every company"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._frame((self.cube.to_numpy() / self._shifted(periods) - 1) * 100)
+
+    def cagr(self, line_item, start=None, end=None):
+        """Compound annual growth (%) between two fiscal years, per company
+
+        Defaults to each company's first and last year with a value.
+        """
+        panel = self.item(line_item)
+        present = panel.notna()
+        first_year = present.idxmax() if start is None else pd.Series(start, index=panel.columns)
+        last_year = present[::-1].idxmax() if end is None else pd.Series(end, index=panel.columns)
+        periods = (last_year - first_year).where(lambda n: n > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = (_at(panel, last_year) / _at(panel, first_year)) ** (1 / periods) - 1
+        return (rate * 100).rename_axis('company').rename(cagr_column(line_item))
+
+    def derived(self, cagr_windows=()):
+        """Fiscal years by (metric column, company) for every derived metric with a value"""
+        revenue = self.item('Total Revenue')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = {}
+            # Direct costs are reported as negative amounts
+            ratios['Gross Margin (%)'] = (revenue - self.item('Direct Costs').abs()) / revenue * 100
+            for margin, line_item in MARGINS.items():
+                ratios[f'{margin} (%)'] = self.item(line_item) / revenue * 100
+            for name, (numerator, denominator) in RETURNS.items():
+                ratios[f'{name} (%)'] = self.item(numerator) / self.item(denominator) * 100
+
+            # Per line item metrics are array arithmetic over the whole cube
+            values = self.cube.to_numpy()
+            change = self._frame(values - self._shifted(1))
+            # CAGR from each company's first year with a value to every later year;
+            # rows are consecutive years, so elapsed years are row distances
+            first_row = (~np.isnan(values)).argmax(axis=0)
+            first_value = values[first_row, np.arange(values.shape[1])]
+            elapsed = (np.arange(len(values))[:, None] - first_row[None, :]).astype(float)
+            elapsed[elapsed <= 0] = np.nan
+            since_start = ((values / first_value) ** (1 / elapsed) - 1) * 100
+            # 1 ** NaN is 1, so years without an elapsed period are masked explicitly
+            since_start[np.isnan(elapsed)] = np.nan
+            since_start = self._frame(since_start)
+            windows = {n: self._frame(((values / self._shifted(n)) ** (1 / n) - 1) * 100) for n in cagr_windows}
+
+        def named(frame, column):
+            return frame.rename(columns=column, level='line_item')
+
+        parts = [
+            pd.concat(ratios, axis=1, names=['line_item', 'company']),
+            named(self.growth(), growth_column),
+            named(change, change_column),
+            named(since_start, cagr_column),
+        ]
+        parts.extend(named(window, lambda item, n=n: cagr_column(item, n)) for n, window in windows.items())
+        derived = pd.concat(parts, axis=1).rename_axis(columns=['metric', 'company'])
+        return derived.loc[:, derived.notna().any()]
+
+    def metrics(self, cagr_windows=()):
+        """Line items and derived metrics, one row per (Company, Fiscal Year) with facts
+
+        Percentages are in percent; growth and CAGR compare a year with earlier
+        years of the same company only.
+        """
+        with span('analytics', 'analytics', companies=len(self.companies), years=len(self.cube)):
+            base = self.facts.wide()
+            if base.empty:
+                return base
+            derived = self.derived(cagr_windows).stack('company')
+            derived = derived.rename_axis(index=['Fiscal Year', 'Company'], columns=None).reset_index()
+            return base.merge(derived, on=['Company', 'Fiscal Year'], how='left')
+
+
+def metrics_key(tables, companies, cagr_windows, root=processed_store.store_dir):
+    """Cache key: what is asked for, the version of every input table and the code computing it"""
+    payload = {
+        'tables': list(tables),
+        'companies': None if companies is None else sorted(companies),
+        'cagr_windows': sorted(cagr_windows),
+        'versions': [processed_store.table_version(table, root) for table in tables],
+        'code': CODE_VERSION,
+    }
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()
+
+
+_memo = {}
+
+
+def _prune(directory, keep=MAX_CACHED_RESULTS):
+    """Delete all but the `keep` most recently used results in `directory`"""
+    results = []
+    for name in os.listdir(directory):
+        if name.endswith('.parquet'):
+            path = os.path.join(directory, name)
+            try:
+                results.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+    for _, path in sorted(results, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # pruned by another process
+
+
+def load_metrics(tables=DEFAULT_TABLES, companies=None, cagr_windows=(), root=processed_store.store_dir,
+                 directory=cache_dir):
+    """Metrics of processed tables, computed once per version of their inputs
+
+    Results are memoized in this process and saved under `directory`, so the
+    report, the charts and the dashboard, which all ask for every company of
+    the default tables, reuse one computation until a table is rewritten.
+    Only the MAX_CACHED_RESULTS most recently used results are kept on disk.
+    The returned frame is shared; copy it before modifying it.
+    """
+    key = metrics_key(tables, companies, cagr_windows, root)
+    if key in _memo:
+        return _memo[key]
+
+    path = os.path.join(directory, f"{key}.parquet")
+    if os.path.exists(path):
+        metrics = pd.read_parquet(path)
+        os.utime(path)  # recently used, so pruned last
+    else:
+        facts = FactTable.concat([FactTable.load(table, companies=companies, root=root) for table in tables])
+        metrics = Analytics(facts).metrics(cagr_windows)
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        metrics.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        _prune(directory)
+
+    _memo[key] = metrics
+    return metrics
+
+
+def company_metrics(metrics, company):
+    """Rows of one company sorted by year, without the Company column"""
+    rows = metrics[metrics['Company'] == company].drop(columns='Company')
+    return rows.sort_values('Fiscal Year').reset_index(drop=True)
+
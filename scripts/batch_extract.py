@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.parquet as pq
+from page_analysis import PageAnalysis
+from page_stream import iter_pages
+from processed_store import DEFAULT_COMPANY
+from table_region import load_profiles, locate_region, region_table
+from tracing import profiled
+
+extracted_dir = "data/extracted"
+dataset_path = os.path.join(extracted_dir, "statements.parquet")
+
+STATEMENTS = ["income_statement", "balance_sheet", "cash_flow"]
+
+# One row per table cell; dictionary-encoded text columns keep the file small
+CELL_DTYPES = {
+    "report": "category",
+    "year": "int16",
+    "statement": "category",
+    "page": "int16",
+    "row": "int32",
+    "col": "int16",
+    "cell": "string",
+}
+
+
+def extract_statement_cells(pdf_path, page_num, statement, region=None, profiles=None):
+    """Cells of a statement's table on a 0-indexed page as (row, col, text) tuples
+
+    Only the statement's region is searched for a table, with the table
+    settings of its layout (see table_region). The region comes from the
+    manifest, or is located on the page when the manifest predates regions;
+    locating and extracting then share one layout pass (see page_analysis).
+    """
+    for _, page in iter_pages(pdf_path, [page_num]):
+        with profiled('extract_tables', pdf=os.path.basename(pdf_path), page=page_num):
+            analysis = PageAnalysis(page)
+            if region is None:
+                region = locate_region(analysis, statement)
+            rows = region_table(analysis, region, profiles)
+
+    return [
+        (row_num, col_num, cell)
+        for row_num, row in enumerate(rows)
+        for col_num, cell in enumerate(row)
+    ]
+
+
+def _extract_task(task):
+    pdf_file, pdf_path, year, statement, page_num, region, profiles = task
+    cells = extract_statement_cells(pdf_path, page_num, statement, region, profiles)
+    return pdf_file, year, statement, page_num, cells
+
+
+def extract_all(raw_dir, manifest, workers=None, profiles=None):
+    """Extract every located statement of every report concurrently into one long cell frame"""
+    profiles = profiles or load_profiles()
+    tasks = [
+        (pdf_file, os.path.join(raw_dir, pdf_file), int(entry["year"]), statement, entry[statement],
+         entry.get("regions", {}).get(statement), profiles)
+        for pdf_file, entry in manifest.items()
+        for statement in STATEMENTS
+        if entry.get(statement) is not None
+    ]
+
+    if workers == 1:
+        results = [_extract_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_extract_task, tasks))
+
+    columns = {name: [] for name in CELL_DTYPES}
+    for pdf_file, year, statement, page_num, cells in results:
+        for row_num, col_num, cell in cells:
+            columns["report"].append(pdf_file)
+            columns["year"].append(year)
+            columns["statement"].append(statement)
+            columns["page"].append(page_num)
+            columns["row"].append(row_num)
+            columns["col"].append(col_num)
+            columns["cell"].append(cell)
+
+    cells = pd.DataFrame(columns).astype(CELL_DTYPES)
+    return cells.sort_values(["report", "statement", "row", "col"], ignore_index=True)
+
+
+def write_dataset(cells, path=dataset_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cells.to_parquet(path, index=False)
+
+
+def load_statement(statement, year, path=dataset_path, company=DEFAULT_COMPANY):
+    """One company's statement as a wide frame, laid out like the old headerless per-year CSVs
+
+    Datasets collected by ingest.py hold several companies in a company
+    column; one written by extract_financials has none and is all Safaricom.
+    """
+    filters = [("statement", "==", statement), ("year", "==", int(year))]
+    if "company" in pq.read_schema(path).names:
+        filters.append(("company", "==", company))
+    elif company != DEFAULT_COMPANY:
+        raise FileNotFoundError(f"No {company} cells in {path}")
+    cells = pd.read_parquet(path, columns=["row", "col", "cell"], filters=filters)
+    if cells.empty:
+        raise FileNotFoundError(f"No {company} {statement} cells for {year} in {path}")
+
+    wide = cells.pivot(index="row", columns="col", values="cell")
+    wide = wide.astype(object).where(wide.notna(), None)
+    wide.index.name = None
+    wide.columns.name = None
+    return wide.reset_index(drop=True)
@@ -0,0 +1,77 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cell_parser import parse_numeric
+
+
+def legacy_clean_value(val):
+    """The per-cell parser previously copied into four scripts, kept here as the baseline"""
+    if pd.isna(val) or val == '':
+        return None
+    val = str(val).strip().replace(',', '').replace('\n', ' ')
+    if '(' in val and ')' in val:
+        val = '-' + val.replace('(', '').replace(')', '')
+    try:
+        return float(val)
+    except:
+        return None
+
+
+def make_cells(n, seed=0):
+    """Realistic mix of statement cells: formatted numbers, negatives, nil dashes, notes and labels"""
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(0, 500000, n).round(1)
+    kinds = rng.choice(['plain', 'negative', 'nil', 'note', 'label', 'empty'], n,
+                       p=[0.55, 0.2, 0.05, 0.08, 0.07, 0.05])
+
+    cells = np.empty(n, dtype=object)
+    for i in range(n):
+        kind = kinds[i]
+        if kind == 'plain':
+            cells[i] = f"{amounts[i]:,.1f}"
+        elif kind == 'negative':
+            cells[i] = f"({amounts[i]:,.1f})"
+        elif kind == 'nil':
+            cells[i] = '-'
+        elif kind == 'note':
+            cells[i] = f"{i % 40}(a)"
+        elif kind == 'label':
+            cells[i] = 'Revenue from contracts with customers'
+        else:
+            cells[i] = None
+    return pd.Series(cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-cell and vectorized cell parsing")
+    parser.add_argument('--cells', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cells = make_cells(args.cells)
+
+    print("="*70)
+    print(f"CELL PARSER BENCHMARK ({args.cells:,} cells)")
+    print("="*70)
+
+    start = time.perf_counter()
+    legacy = cells.map(legacy_clean_value)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = parse_numeric(cells)
+    vectorized_time = time.perf_counter() - start
+
+    agree = np.allclose(legacy.astype('float64'), vectorized, equal_nan=True)
+
+    print(f"Per-cell clean_value: {legacy_time:.2f}s ({args.cells / legacy_time:,.0f} cells/sec)")
+    print(f"parse_numeric:        {vectorized_time:.2f}s ({args.cells / vectorized_time:,.0f} cells/sec)")
+    print(f"Speedup:              {legacy_time / vectorized_time:.1f}x")
+    print(f"Results agree:        {'yes' if agree else 'NO'}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+from statement_scan import scan_reports
+
+raw_data_dir = "data/raw"
+
+
+def timed_scan(pdf_paths, header_band):
+    """Scan with a throwaway cache so the timing measures pdfplumber, not cache hits"""
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        results, stats = scan_reports(
+            pdf_paths, header_band=header_band, cache_path=os.path.join(tmp, "bench.sqlite")
+        )
+        elapsed = time.perf_counter() - start
+    return results, stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-page and header-band statement discovery")
+    parser.add_argument('--raw-dir', default=raw_data_dir)
+    parser.add_argument('--header-band', type=float, default=0.25)
+    args = parser.parse_args()
+
+    pdf_files = sorted([f for f in os.listdir(args.raw_dir) if f.endswith('.pdf')])
+    pdf_paths = [os.path.join(args.raw_dir, f) for f in pdf_files]
+
+    print("="*70)
+    print(f"DISCOVERY BENCHMARK: full page vs header band ({args.header_band:.0%} of page)")
+    print("="*70)
+
+    full_results, full_stats, full_time = timed_scan(pdf_paths, None)
+    band_results, band_stats, band_time = timed_scan(pdf_paths, args.header_band)
+
+    total_pages = sum(r['page_count'] for r in full_results.values())
+    # Band mode extracts every page once, plus the full page for ambiguous ones
+    fallbacks = band_stats['misses'] - full_stats['misses']
+
+    all_match = True
+    for pdf_file, pdf_path in zip(pdf_files, pdf_paths):
+        full_found = full_results[pdf_path]['found']
+        band_found = band_results[pdf_path]['found']
+        match = full_found == band_found
+        all_match = all_match and match
+
+        print(f"\n{pdf_file} ({full_results[pdf_path]['page_count']} pages)")
+        print(f"  Full page:   {full_found}")
+        print(f"  Header band: {band_found}")
+        print(f"  {'✓ Same pages found' if match else '✗ Results differ'}")
+
+    print("\n" + "="*70)
+    print(f"Pages scanned:       {total_pages}")
+    print(f"Full page:           {full_time:.2f}s ({total_pages / full_time:.1f} pages/sec)")
+    print(f"Header band:         {band_time:.2f}s ({total_pages / band_time:.1f} pages/sec)")
+    print(f"Full-page fallbacks: {fallbacks}")
+    print(f"Speedup:             {full_time / band_time:.2f}x")
+    print(f"Results identical:   {'yes' if all_match else 'NO'}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
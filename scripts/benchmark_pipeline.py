@@ -0,0 +1,133 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from batch_extract import extract_all
+from line_items import tag_cells
+from statement_locator import build_manifest
+from statement_scan import scan_reports
+from synthetic_reports import ENTITY_SETS, LAYOUTS, NUMBER_FORMATS, generate_reports
+
+
+def subset_dir(paths, directory):
+    """Directory holding links to the first reports only, for the raw_dir-based stages"""
+    os.makedirs(directory, exist_ok=True)
+    for path in paths:
+        link = os.path.join(directory, os.path.basename(path))
+        if not os.path.exists(link):
+            os.symlink(os.path.abspath(path), link)
+    return directory
+
+
+def run_round(paths, work_dir, workers, header_band):
+    """Time discovery, table extraction and parsing over one set of reports
+
+    Every stage starts from an empty page cache, so the timings measure pdfplumber
+    and pandas rather than cache hits.
+    """
+    raw_dir = subset_dir(paths, os.path.join(work_dir, "raw"))
+    result = {"reports": len(paths)}
+
+    # Discovery: the explore_pdf.py scan over every page
+    start = time.perf_counter()
+    scan, _ = scan_reports(paths, workers=workers, header_band=header_band,
+                           cache_path=os.path.join(work_dir, "scan.sqlite"))
+    result["discovery_s"] = time.perf_counter() - start
+    result["pages"] = sum(report["page_count"] for report in scan.values())
+    result["statements_found"] = sum(len(report["found"]) for report in scan.values())
+
+    # Extraction: extract_financials.py, locating statements then pulling their tables
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest = build_manifest(raw_dir, os.path.join(work_dir, "manifest.json"),
+                                  cache_path=os.path.join(work_dir, "locate.sqlite"))
+    result["locate_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cells = extract_all(raw_dir, manifest, workers=workers)
+    result["extract_s"] = time.perf_counter() - start
+    result["statement_pages"] = sum(
+        entry.get(statement) is not None
+        for entry in manifest.values()
+        for statement in ("income_statement", "balance_sheet", "cash_flow")
+    )
+    result["cells"] = len(cells)
+
+    # Parsing: numeric parsing and line-item tagging of every cell
+    start = time.perf_counter()
+    tagged = tag_cells(cells)
+    result["parse_s"] = time.perf_counter() - start
+    result["metrics_tagged"] = int(tagged["metric"].notna().sum())
+    return result
+
+
+def print_results(results):
+    base = results[0]
+    print(f"\n{'reports':>8} {'pages':>8} {'discover p/s':>13} {'locate rep/s':>13} "
+          f"{'extract p/s':>12} {'parse cells/s':>14} {'scaling':>8}")
+    for r in results:
+        discovery_rate = r["pages"] / r["discovery_s"]
+        # Throughput relative to the smallest run; 1.0 means flat per-page cost
+        scaling = discovery_rate / (base["pages"] / base["discovery_s"])
+        print(f"{r['reports']:>8} {r['pages']:>8} {discovery_rate:>13.1f} "
+              f"{r['reports'] / r['locate_s']:>13.2f} "
+              f"{r['statement_pages'] / r['extract_s']:>12.1f} "
+              f"{r['cells'] / r['parse_s'] if r['parse_s'] else 0:>14,.0f} {scaling:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of discovery, extraction and parsing on synthetic reports")
+    parser.add_argument('--counts', default="1,10,100",
+                        help="comma-separated report counts to run (up to 1000)")
+    parser.add_argument('--pages', type=int, default=250, help="pages per report")
+    parser.add_argument('--layout', choices=LAYOUTS, default='ruled')
+    parser.add_argument('--entities', choices=list(ENTITY_SETS), default='group_company')
+    parser.add_argument('--number-format', choices=NUMBER_FORMATS, default='brackets')
+    parser.add_argument('--outline', action='store_true', help="give the reports statement bookmarks")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for discovery and extraction (0 = one per CPU core)")
+    parser.add_argument('--header-band', type=float, default=None,
+                        help="discovery reads only the top fraction of each page (e.g. 0.25)")
+    parser.add_argument('--reports-dir', default=None,
+                        help="keep generated reports here and reuse them between runs")
+    parser.add_argument('--json', default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    counts = sorted(int(c) for c in args.counts.split(','))
+
+    print("="*70)
+    print(f"PIPELINE BENCHMARK: {args.pages}-page {args.layout} reports, "
+          f"{args.entities} columns, {args.number_format} numbers")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reports_dir = args.reports_dir or os.path.join(tmp, "reports")
+        start = time.perf_counter()
+        paths = generate_reports(reports_dir, counts[-1], pages=args.pages, layout=args.layout,
+                                 entities=args.entities, number_format=args.number_format,
+                                 outline=args.outline)
+        print(f"✓ {len(paths)} reports ready in {time.perf_counter() - start:.2f}s")
+
+        results = []
+        for count in counts:
+            result = run_round(paths[:count], os.path.join(tmp, f"run-{count}"), args.workers, args.header_band)
+            results.append(result)
+            print(f"✓ {count} reports: discovery {result['discovery_s']:.2f}s, "
+                  f"locate {result['locate_s']:.2f}s, extract {result['extract_s']:.2f}s, "
+                  f"parse {result['parse_s']:.2f}s ({result['metrics_tagged']} metrics tagged)")
+
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"\n✓ Results saved to: {args.json}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,263 @@
-import pandas as pd
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+from analytics import growth_column, load_metrics
+from facts import FactTable
+
+template_dir = "templates"
+TEMPLATE = "financial_report.txt"
+
+output_file = "data/processed/SAFARICOM_FINANCIAL_REPORT.txt"
+# Batch runs write one file per company and period here
+reports_dir = "data/processed/reports"
+
+DEFAULT_COMPANY = "SCOM"
+COMPANY_NAMES = {'SCOM': 'Safaricom PLC'}
+EXCHANGE = "NSE"
+ANALYSIS_DATE = "January 2026"
+
+# Derived metrics the template and observations read. Analytics drops a metric
+# no company has a value for (growth when every company has one year), so
+# missing ones are added back empty.
+REPORT_METRICS = [growth_column('Total Revenue'), growth_column('Net Profit'), 'EBITDA Margin (%)',
+                  'Net Margin (%)']
+
+
+def pct(value):
+    return f"{value:.2f}"
+
+
+def money(value):
+    return f"KShs {value:,.0f}M"
+
+
+def growth(value):
+    return "" if pd.isna(value) else f" ({value:+.1f}%)"
+
+
+def report_environment(directory=template_dir):
+    """Jinja environment for the plain-text report templates"""
+    env = Environment(loader=FileSystemLoader(directory), trim_blocks=True, lstrip_blocks=True,
+                      undefined=StrictUndefined, autoescape=False)
+    env.filters.update(pct=pct, money=money, growth=growth)
+    return env
+
+
+def _lowest(values):
+    present = values[~np.isnan(values)]
+    return present.min() if len(present) else np.nan
+
+
+def _growth_within(metrics, line_item):
+    """Growth of `line_item` in each of the report's years, NaN for its first year
+
+    The first year's growth compares it with a year outside the report, so it
+    does not count towards the report's observations.
+    """
+    values = metrics[growth_column(line_item)].to_numpy(dtype=float, copy=True)
+    values[:1] = np.nan
+    return values
+
+
+def observations(metrics):
+    """(strengths, concerns) that follow from a company's metrics over the report's years"""
+    years = metrics['Fiscal Year'].to_numpy()
+    revenue_growth = _growth_within(metrics, 'Total Revenue')
+    profit_growth = _growth_within(metrics, 'Net Profit')
+    net_margin = metrics['Net Margin (%)'].to_numpy()
+    reported_growth = revenue_growth[~np.isnan(revenue_growth)]
+
+    strengths, concerns = [], []
+    low, high = f"{_lowest(revenue_growth):.0f}", f"{-_lowest(-revenue_growth):.0f}"
+    growth_range = f"{low}% annually" if low == high else f"{low}-{high}% annually"
+    if not len(reported_growth):
+        pass  # a single year has no growth to describe
+    elif (reported_growth >= 10).all():
+        strengths.append(f"Consistent double-digit revenue growth ({growth_range})")
+    elif (reported_growth > 0).all():
+        strengths.append(f"Revenue grew every year ({growth_range})")
+    else:
+        concerns.append(f"Revenue fell in FY {', '.join(str(y) for y in years[revenue_growth < 0])}")
+
+    lowest_ebitda_margin = _lowest(metrics['EBITDA Margin (%)'].to_numpy())
+    if lowest_ebitda_margin >= 30:
+        strengths.append(f"Strong EBITDA margins above {int(lowest_ebitda_margin)}%")
+
+    if profit_growth[-1] > 0 and (profit_growth < 0).any():
+        strengths.append(f"Recovery in net profit in FY {years[-1]}")
+    declined = (profit_growth < 0) & (revenue_growth > 0)
+    for year, change in zip(years[declined], profit_growth[declined]):
+        degree = " significantly" if change <= -10 else ""
+        concerns.append(f"Net profit declined{degree} in FY {year} despite revenue growth")
+
+    if net_margin[-1] < net_margin[0]:
+        concerns.append(f"Declining net profit margins ({net_margin[0]:.2f}% → {net_margin[-1]:.2f}%)")
+        concerns.append("Suggests increasing operational costs or other expenses")
+    return strengths, concerns
+
+
+def report_context(company, metrics, rows, table):
+    """Template variables for one company's report
+
+    `metrics` holds the company's rows for the report's years, `rows` the
+    same rows as dicts, and `table` the detailed line items of those years.
+    """
+    first, last = metrics.iloc[0], metrics.iloc[-1]
+    first_year, last_year = int(first['Fiscal Year']), int(last['Fiscal Year'])
+    # CAGR over the report's own years, which need not start at the company's first year
+    years = last_year - first_year
+    revenue_cagr = ((last['Total Revenue (KShs M)'] / first['Total Revenue (KShs M)']) ** (1 / years) - 1) * 100 \
+        if years else float('nan')
+    strengths, concerns = observations(metrics)
+    return {
+        'company': company,
+        'name': COMPANY_NAMES.get(company, company),
+        'exchange': EXCHANGE,
+        'first_year': first_year,
+        'last_year': last_year,
+        'revenue_cagr': revenue_cagr,
+        'rows': rows,
+        'table': table.to_string(index=False),
+        'strengths': strengths,
+        'concerns': concerns,
+        'analysis_date': ANALYSIS_DATE,
+    }
+
+
+# Per-process state of the worker pool: loaded once per worker, not per report
+_shared = {}
+
+
+def load_shared(companies=None, directory=template_dir):
+    """Per-company metrics and detailed tables, and the compiled template, for this process
+
+    Metrics come from the shared analytics cache, so workers read one file
+    rather than recomputing. Everything a report needs is split by company
+    here once, so rendering one is a slice by year.
+    """
+    metrics = load_metrics()
+    if companies is not None:
+        metrics = metrics[metrics['Company'].isin(companies)]
+    metrics = metrics.reindex(columns=metrics.columns.union(REPORT_METRICS, sort=False))
+    metrics = metrics.sort_values(['Company', 'Fiscal Year']).reset_index(drop=True)
+    records = metrics.to_dict('records')
+    tables = FactTable.load('analysis', companies=companies).wide()
+
+    _shared.update(
+        metrics={company: rows.reset_index(drop=True) for company, rows in metrics.groupby('Company')},
+        records={company: records[rows.index[0]:rows.index[-1] + 1]
+                 for company, rows in metrics.groupby('Company')},
+        tables={company: rows.drop(columns='Company').reset_index(drop=True)
+                for company, rows in tables.groupby('Company')},
+        template=report_environment(directory).get_template(TEMPLATE),
+    )
+    return _shared
+
+
+def report_jobs(metrics, companies, first_year=None, last_year=None, window=None, directory=reports_dir):
+    """(company, first_year, last_year, path) of every report to render
+
+    `metrics` maps each company to its rows. Each company gets one report
+    over its years in [first_year, last_year], or with `window` one report
+    per run of `window` consecutive fiscal years.
+    """
+    jobs = []
+    for company in companies:
+        if company not in metrics:
+            continue
+        years = [int(y) for y in metrics[company]['Fiscal Year']]
+        years = [y for y in years if (first_year is None or y >= first_year)
+                 and (last_year is None or y <= last_year)]
+        if not years:
+            continue
+        if window is None:
+            periods = [(years[0], years[-1])]
+        else:
+            periods = [(end - window + 1, end) for end in years if end - window + 1 in years]
+        jobs.extend((company, start, end, os.path.join(directory, f"{company}_FY{start}-{end}.txt"))
+                    for start, end in periods)
+    return jobs
+
+
+def render_report(job):
+    """Render one report straight to disk; returns its path"""
+    company, first_year, last_year, path = job
+    shared = _shared or load_shared()
+    metrics = shared['metrics'][company]
+    in_period = metrics['Fiscal Year'].between(first_year, last_year).to_numpy()
+    rows = [row for row, keep in zip(shared['records'][company], in_period) if keep]
+    metrics = metrics[in_period].reset_index(drop=True)
+    table = shared['tables'].get(company, pd.DataFrame(columns=['Fiscal Year']))
+    table = table[table['Fiscal Year'].between(first_year, last_year)].dropna(axis=1, how='all')
+
+    stream = shared['template'].stream(report_context(company, metrics, rows, table))
+    stream.enable_buffering(64)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        stream.dump(f)
+    os.replace(tmp, path)
+    return path
+
+
+def _init_worker(companies, directory):
+    # Forked workers inherit the parent's data; spawned ones load their own
+    if not _shared:
+        load_shared(companies, directory)
+
+
+def render_reports(jobs, workers=None, companies=None, directory=template_dir):
+    """Render reports over a process pool; paths come back in job order"""
+    for path in {os.path.dirname(job[3]) or '.' for job in jobs}:
+        os.makedirs(path, exist_ok=True)
+    if workers == 1 or len(jobs) <= 1:
+        return [render_report(job) for job in jobs]
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(companies, directory)) as pool:
+        return list(pool.map(render_report, jobs, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render financial analysis reports from the processed data")
+    parser.add_argument('--companies', nargs='+', help=f"tickers to report on (default {DEFAULT_COMPANY})")
+    parser.add_argument('--all', action='store_true', help="report on every company in the data")
+    parser.add_argument('--first-year', type=int)
+    parser.add_argument('--last-year', type=int)
+    parser.add_argument('--window', type=int, help="one report per run of this many fiscal years")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--output-dir', default=reports_dir)
+    parser.add_argument('--templates', default=template_dir)
+    args = parser.parse_args()
+
+    companies = None if args.all else (args.companies or [DEFAULT_COMPANY])
+    start = time.perf_counter()
+    shared = load_shared(companies, args.templates)
+    jobs = report_jobs(shared['metrics'], sorted(shared['metrics']) if companies is None else companies,
+                       args.first_year, args.last_year, args.window, args.output_dir)
+
+    batch = args.all or args.companies or args.first_year or args.last_year or args.window
+    if not batch:
+        # The default run is the Safaricom report the pipeline publishes
+        jobs = [(company, first, last, output_file) for company, first, last, _ in jobs]
+
+    paths = render_reports(jobs, args.workers, companies, args.templates)
+    elapsed = time.perf_counter() - start
+
+    if not batch:
+        with open(output_file) as f:
+            print(f.read())
+        print(f"\n✓ Report saved to: {output_file}")
+    else:
+        for job in jobs[-5:]:
+            print(f"✓ {job[0]} FY {job[1]}-{job[2]}: {job[3]}")
+        print(f"\n✓ {len(paths)} reports saved to {args.output_dir} in {elapsed:.2f}s")
+
 
-# Read the processed data
-df = pd.read_csv('data/processed/safaricom_3year_analysis.csv')
-
-# Create a formatted report
-report = []
-report.append("="*80)
-report.append("SAFARICOM PLC - FINANCIAL ANALYSIS REPORT (FY 2023-2025)")
-report.append("="*80)
-report.append("")
-
-# Summary statistics
-report.append("EXECUTIVE SUMMARY")
-report.append("-"*80)
-report.append(f"Analysis Period: FY 2023 - FY 2025")
-report.append(f"Company: Safaricom PLC (NSE: SCOM)")
-report.append(f"Currency: Kenya Shillings (KShs) - Millions")
-report.append("")
-
-# Key findings
-report.append("KEY FINDINGS:")
-report.append("")
-
-# Revenue trend
-revenue_cagr = (((df.iloc[-1]['Total Revenue (KShs M)'] / df.iloc[0]['Total Revenue (KShs M)']) ** (1/2)) - 1) * 100
-report.append(f"1. Revenue CAGR (2023-2025): {revenue_cagr:.2f}%")
-report.append(f"   - FY 2023: KShs {df.iloc[0]['Total Revenue (KShs M)']:,.0f}M")
-report.append(f"   - FY 2024: KShs {df.iloc[1]['Total Revenue (KShs M)']:,.0f}M (+12.4%)")
-report.append(f"   - FY 2025: KShs {df.iloc[2]['Total Revenue (KShs M)']:,.0f}M (+11.2%)")
-report.append("")
-
-# Profitability
-report.append("2. Profitability Trends:")
-for idx, row in df.iterrows():
-    year = int(row['Fiscal Year'])
-    ebitda_margin = (row['EBITDA (KShs M)'] / row['Total Revenue (KShs M)']) * 100
-    net_margin = (row['Net Profit (KShs M)'] / row['Total Revenue (KShs M)']) * 100
-    report.append(f"   FY {year}: EBITDA Margin {ebitda_margin:.2f}% | Net Margin {net_margin:.2f}%")
-report.append("")
-
-# Net profit analysis
-report.append("3. Net Profit Performance:")
-report.append(f"   - FY 2023: KShs {df.iloc[0]['Net Profit (KShs M)']:,.0f}M")
-report.append(f"   - FY 2024: KShs {df.iloc[1]['Net Profit (KShs M)']:,.0f}M (-18.7%)")
-report.append(f"   - FY 2025: KShs {df.iloc[2]['Net Profit (KShs M)']:,.0f}M (+7.3%)")
-report.append("")
-
-# Detailed table
-report.append("")
-report.append("="*80)
-report.append("DETAILED FINANCIAL METRICS")
-report.append("="*80)
-report.append("")
-report.append(df.to_string(index=False))
-report.append("")
-
-# Observations
-report.append("="*80)
-report.append("OBSERVATIONS")
-report.append("="*80)
-report.append("")
-report.append("STRENGTHS:")
-report.append("• Consistent double-digit revenue growth (11-12% annually)")
-report.append("• Strong EBITDA margins above 44%")
-report.append("• Recovery in net profit in FY 2025")
-report.append("")
-report.append("CONCERNS:")
-report.append("• Net profit declined significantly in FY 2024 despite revenue growth")
-report.append("• Declining net profit margins (16.88% → 11.77%)")
-report.append("• Suggests increasing operational costs or other expenses")
-report.append("")
-
-# Methodology
-report.append("="*80)
-report.append("METHODOLOGY")
-report.append("="*80)
-report.append("")
-report.append("Data Source: Safaricom PLC Annual Reports (FY 2023, 2024, 2025)")
-report.append("Extraction Method: Automated PDF parsing using Python (pdfplumber)")
-report.append("Data Points: Income Statement metrics from consolidated GROUP results")
-report.append("Analysis Date: January 2026")
-report.append("")
-report.append("="*80)
-report.append("END OF REPORT")
-report.append("="*80)
-
-# Print and save report
-report_text = '\n'.join(report)
-print(report_text)
-
-# Save to file
-output_file = 'data/processed/SAFARICOM_FINANCIAL_REPORT.txt'
-with open(output_file, 'w') as f:
-    f.write(report_text)
-
-print(f"\n✓ Report saved to: {output_file}")
+if __name__ == "__main__":
+    main()
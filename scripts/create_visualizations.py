@@ -1,226 +1,418 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
+
+# Charts are only ever written to files, so never start a GUI backend (also
+# keeps worker processes from touching a display)
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import os
 
-# Create visualizations directory
+from analytics import Analytics, cagr_column, growth_column, load_metrics
+from facts import FactTable
+from tracing import span
+
 viz_dir = 'visualizations'
-os.makedirs(viz_dir, exist_ok=True)
-
-# Read the processed data
-df = pd.read_csv('data/processed/safaricom_3year_analysis.csv')
-
-# Set style for better-looking charts
-plt.style.use('seaborn-v0_8-darkgrid')
-colors = ['#2E7D32', '#1976D2', '#D32F2F']  # Green, Blue, Red
-
-print("="*70)
-print("CREATING VISUALIZATIONS")
-print("="*70)
-
-# 1. Revenue Trend Chart
-fig, ax = plt.subplots(figsize=(12, 6))
-years = df['Fiscal Year'].astype(int)
-revenue = df['Total Revenue (KShs M)']
-
-ax.plot(years, revenue, marker='o', linewidth=3, markersize=10, color='#2E7D32')
-ax.fill_between(years, revenue, alpha=0.3, color='#2E7D32')
-
-# Add value labels
-for i, (x, y) in enumerate(zip(years, revenue)):
-    ax.text(x, y + 5000, f'KShs {y:,.0f}M', ha='center', fontsize=10, fontweight='bold')
-
-ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
-ax.set_ylabel('Revenue (KShs Millions)', fontsize=12, fontweight='bold')
-ax.set_title('Safaricom Revenue Growth (FY 2023-2025)', fontsize=16, fontweight='bold', pad=20)
-ax.grid(True, alpha=0.3)
-ax.set_xticks(years)
-
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/1_revenue_trend.png', dpi=300, bbox_inches='tight')
-print("✓ Created: 1_revenue_trend.png")
-plt.close()
-
-# 2. Profitability Metrics (Bar Chart)
-fig, ax = plt.subplots(figsize=(12, 6))
-
-metrics = ['EBITDA (KShs M)', 'Operating Profit (KShs M)', 'Net Profit (KShs M)']
-x = range(len(years))
-width = 0.25
-
-for i, metric in enumerate(metrics):
-    values = df[metric]
-    offset = (i - 1) * width
-    bars = ax.bar([p + offset for p in x], values, width, label=metric.replace(' (KShs M)', ''), 
-                   color=colors[i], alpha=0.8)
-    
-    # Add value labels on bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{height:,.0f}M', ha='center', va='bottom', fontsize=8)
-
-ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
-ax.set_ylabel('Amount (KShs Millions)', fontsize=12, fontweight='bold')
-ax.set_title('Safaricom Profitability Metrics (FY 2023-2025)', fontsize=16, fontweight='bold', pad=20)
-ax.set_xticks(x)
-ax.set_xticklabels(years.astype(int))
-ax.legend(loc='upper left', fontsize=10)
-ax.grid(True, alpha=0.3, axis='y')
-
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/2_profitability_metrics.png', dpi=300, bbox_inches='tight')
-print("✓ Created: 2_profitability_metrics.png")
-plt.close()
-
-# 3. Profit Margins (Line Chart)
-fig, ax = plt.subplots(figsize=(12, 6))
-
-# Calculate margins
-ebitda_margin = (df['EBITDA (KShs M)'] / df['Total Revenue (KShs M)']) * 100
-net_margin = (df['Net Profit (KShs M)'] / df['Total Revenue (KShs M)']) * 100
-
-ax.plot(years, ebitda_margin, marker='o', linewidth=3, markersize=10, 
-        label='EBITDA Margin', color='#1976D2')
-ax.plot(years, net_margin, marker='s', linewidth=3, markersize=10, 
-        label='Net Profit Margin', color='#D32F2F')
-
-# Add value labels
-for i, (x, y1, y2) in enumerate(zip(years, ebitda_margin, net_margin)):
-    ax.text(x, y1 + 1, f'{y1:.1f}%', ha='center', fontsize=10, fontweight='bold', color='#1976D2')
-    ax.text(x, y2 - 2, f'{y2:.1f}%', ha='center', fontsize=10, fontweight='bold', color='#D32F2F')
-
-ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
-ax.set_ylabel('Margin (%)', fontsize=12, fontweight='bold')
-ax.set_title('Safaricom Profit Margins Trend (FY 2023-2025)', fontsize=16, fontweight='bold', pad=20)
-ax.set_xticks(years)
-ax.legend(loc='best', fontsize=11)
-ax.grid(True, alpha=0.3)
-ax.set_ylim(0, 60)
-
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/3_profit_margins.png', dpi=300, bbox_inches='tight')
-print("✓ Created: 3_profit_margins.png")
-plt.close()
-
-# 4. Year-over-Year Growth Rates
-fig, ax = plt.subplots(figsize=(12, 6))
-
-# Calculate growth rates
-revenue_growth = []
-profit_growth = []
-
-for i in range(1, len(df)):
-    rev_growth = ((df.iloc[i]['Total Revenue (KShs M)'] - df.iloc[i-1]['Total Revenue (KShs M)']) / 
-                  df.iloc[i-1]['Total Revenue (KShs M)']) * 100
-    prof_growth = ((df.iloc[i]['Net Profit (KShs M)'] - df.iloc[i-1]['Net Profit (KShs M)']) / 
-                   df.iloc[i-1]['Net Profit (KShs M)']) * 100
-    revenue_growth.append(rev_growth)
-    profit_growth.append(prof_growth)
-
-growth_years = [f'{int(years.iloc[i-1])}→{int(years.iloc[i])}' for i in range(1, len(years))]
-x = range(len(growth_years))
-width = 0.35
-
-bars1 = ax.bar([p - width/2 for p in x], revenue_growth, width, label='Revenue Growth', 
-               color='#2E7D32', alpha=0.8)
-bars2 = ax.bar([p + width/2 for p in x], profit_growth, width, label='Net Profit Growth', 
-               color='#D32F2F', alpha=0.8)
-
-# Add value labels
-for bars in [bars1, bars2]:
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{height:+.1f}%', ha='center', va='bottom' if height > 0 else 'top', 
-                fontsize=10, fontweight='bold')
-
-ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-ax.set_xlabel('Period', fontsize=12, fontweight='bold')
-ax.set_ylabel('Growth Rate (%)', fontsize=12, fontweight='bold')
-ax.set_title('Safaricom Year-over-Year Growth Rates', fontsize=16, fontweight='bold', pad=20)
-ax.set_xticks(x)
-ax.set_xticklabels(growth_years)
-ax.legend(loc='best', fontsize=11)
-ax.grid(True, alpha=0.3, axis='y')
-
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/4_growth_rates.png', dpi=300, bbox_inches='tight')
-print("✓ Created: 4_growth_rates.png")
-plt.close()
-
-# 5. Summary Dashboard (Multi-panel)
-fig = plt.figure(figsize=(16, 10))
-gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
-
-# Panel 1: Revenue
-ax1 = fig.add_subplot(gs[0, 0])
-ax1.bar(years, revenue, color='#2E7D32', alpha=0.7)
-for x, y in zip(years, revenue):
-    ax1.text(x, y, f'{y:,.0f}M', ha='center', va='bottom', fontsize=9, fontweight='bold')
-ax1.set_title('Total Revenue', fontsize=14, fontweight='bold')
-ax1.set_ylabel('KShs Millions', fontsize=10)
-ax1.grid(True, alpha=0.3, axis='y')
-
-# Panel 2: Net Profit
-ax2 = fig.add_subplot(gs[0, 1])
-net_profit = df['Net Profit (KShs M)']
-ax2.bar(years, net_profit, color='#D32F2F', alpha=0.7)
-for x, y in zip(years, net_profit):
-    ax2.text(x, y, f'{y:,.0f}M', ha='center', va='bottom', fontsize=9, fontweight='bold')
-ax2.set_title('Net Profit', fontsize=14, fontweight='bold')
-ax2.set_ylabel('KShs Millions', fontsize=10)
-ax2.grid(True, alpha=0.3, axis='y')
-
-# Panel 3: Margins
-ax3 = fig.add_subplot(gs[1, 0])
-ax3.plot(years, ebitda_margin, marker='o', linewidth=2, markersize=8, label='EBITDA Margin', color='#1976D2')
-ax3.plot(years, net_margin, marker='s', linewidth=2, markersize=8, label='Net Margin', color='#D32F2F')
-ax3.set_title('Profit Margins', fontsize=14, fontweight='bold')
-ax3.set_ylabel('Percentage (%)', fontsize=10)
-ax3.legend(fontsize=9)
-ax3.grid(True, alpha=0.3)
-
-# Panel 4: Key Metrics Summary (Text)
-ax4 = fig.add_subplot(gs[1, 1])
-ax4.axis('off')
-
-summary_text = f"""
+# Last rendered hash per output file, so unchanged charts are skipped
+state_file = '.render_state.json'
+
+DEFAULT_COMPANY = 'Safaricom'
+# Display names for the tickers in the processed store
+COMPANY_NAMES = {'SCOM': 'Safaricom'}
+
+# Everything that affects how a chart looks; part of each chart's hash
+STYLE = {
+    'style': 'seaborn-v0_8-darkgrid',
+    'colors': ['#2E7D32', '#1976D2', '#D32F2F'],  # Green, Blue, Red
+    'dpi': 300,
+}
+
+# Part of every chart's hash, so editing how charts are drawn re-renders them
+with open(__file__, 'rb') as _f:
+    CODE_VERSION = hashlib.sha256(_f.read()).hexdigest()[:16]
+
+
+def _year_range(years):
+    return f'FY {years.iloc[0]}-{years.iloc[-1]}'
+
+
+# Derived columns the charts read, computed by analytics.py
+REVENUE_GROWTH = growth_column('Total Revenue')
+PROFIT_GROWTH = growth_column('Net Profit')
+REVENUE_CAGR = cagr_column('Total Revenue')
+
+
+def plot_revenue_trend(df, company, style):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    years = df['Fiscal Year'].astype(int)
+    revenue = df['Total Revenue (KShs M)']
+
+    ax.plot(years, revenue, marker='o', linewidth=3, markersize=10, color=style['colors'][0])
+    ax.fill_between(years, revenue, alpha=0.3, color=style['colors'][0])
+
+    # Add value labels
+    for x, y in zip(years, revenue):
+        ax.text(x, y + 5000, f'KShs {y:,.0f}M', ha='center', fontsize=10, fontweight='bold')
+
+    ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Revenue (KShs Millions)', fontsize=12, fontweight='bold')
+    ax.set_title(f'{company} Revenue Growth ({_year_range(years)})', fontsize=16, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
+    ax.set_xticks(years)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_profitability_metrics(df, company, style):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    years = df['Fiscal Year'].astype(int)
+
+    metrics = ['EBITDA (KShs M)', 'Operating Profit (KShs M)', 'Net Profit (KShs M)']
+    x = range(len(years))
+    width = 0.25
+
+    for i, metric in enumerate(metrics):
+        values = df[metric]
+        offset = (i - 1) * width
+        bars = ax.bar([p + offset for p in x], values, width, label=metric.replace(' (KShs M)', ''),
+                      color=style['colors'][i], alpha=0.8)
+
+        # Add value labels on bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f'{height:,.0f}M', ha='center', va='bottom', fontsize=8)
+
+    ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Amount (KShs Millions)', fontsize=12, fontweight='bold')
+    ax.set_title(f'{company} Profitability Metrics ({_year_range(years)})', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(years)
+    ax.legend(loc='upper left', fontsize=10)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_profit_margins(df, company, style):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    years = df['Fiscal Year'].astype(int)
+    ebitda_margin, net_margin = df['EBITDA Margin (%)'], df['Net Margin (%)']
+
+    ax.plot(years, ebitda_margin, marker='o', linewidth=3, markersize=10,
+            label='EBITDA Margin', color=style['colors'][1])
+    ax.plot(years, net_margin, marker='s', linewidth=3, markersize=10,
+            label='Net Profit Margin', color=style['colors'][2])
+
+    # Add value labels
+    for x, y1, y2 in zip(years, ebitda_margin, net_margin):
+        ax.text(x, y1 + 1, f'{y1:.1f}%', ha='center', fontsize=10, fontweight='bold', color=style['colors'][1])
+        ax.text(x, y2 - 2, f'{y2:.1f}%', ha='center', fontsize=10, fontweight='bold', color=style['colors'][2])
+
+    ax.set_xlabel('Fiscal Year', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Margin (%)', fontsize=12, fontweight='bold')
+    ax.set_title(f'{company} Profit Margins Trend ({_year_range(years)})', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xticks(years)
+    ax.legend(loc='best', fontsize=11)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 60)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_growth_rates(df, company, style):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    # Growth compares each year with the one before, so the first year has none
+    growth = df.iloc[1:]
+    revenue_growth, profit_growth = growth[REVENUE_GROWTH], growth[PROFIT_GROWTH]
+
+    growth_years = [f'{year - 1}→{year}' for year in growth['Fiscal Year'].astype(int)]
+    x = range(len(growth_years))
+    width = 0.35
+
+    bars1 = ax.bar([p - width/2 for p in x], revenue_growth, width, label='Revenue Growth',
+                   color=style['colors'][0], alpha=0.8)
+    bars2 = ax.bar([p + width/2 for p in x], profit_growth, width, label='Net Profit Growth',
+                   color=style['colors'][2], alpha=0.8)
+
+    # Add value labels
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f'{height:+.1f}%', ha='center', va='bottom' if height > 0 else 'top',
+                    fontsize=10, fontweight='bold')
+
+    ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+    ax.set_xlabel('Period', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Growth Rate (%)', fontsize=12, fontweight='bold')
+    ax.set_title(f'{company} Year-over-Year Growth Rates', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(growth_years)
+    ax.legend(loc='best', fontsize=11)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_dashboard(df, company, style):
+    years = df['Fiscal Year'].astype(int)
+    revenue = df['Total Revenue (KShs M)']
+    net_profit = df['Net Profit (KShs M)']
+    ebitda_margin, net_margin = df['EBITDA Margin (%)'], df['Net Margin (%)']
+
+    fig = plt.figure(figsize=(16, 10))
+    gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
+
+    # Panel 1: Revenue
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax1.bar(years, revenue, color=style['colors'][0], alpha=0.7)
+    for x, y in zip(years, revenue):
+        ax1.text(x, y, f'{y:,.0f}M', ha='center', va='bottom', fontsize=9, fontweight='bold')
+    ax1.set_title('Total Revenue', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('KShs Millions', fontsize=10)
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Panel 2: Net Profit
+    ax2 = fig.add_subplot(gs[0, 1])
+    ax2.bar(years, net_profit, color=style['colors'][2], alpha=0.7)
+    for x, y in zip(years, net_profit):
+        ax2.text(x, y, f'{y:,.0f}M', ha='center', va='bottom', fontsize=9, fontweight='bold')
+    ax2.set_title('Net Profit', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('KShs Millions', fontsize=10)
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    # Panel 3: Margins
+    ax3 = fig.add_subplot(gs[1, 0])
+    ax3.plot(years, ebitda_margin, marker='o', linewidth=2, markersize=8, label='EBITDA Margin', color=style['colors'][1])
+    ax3.plot(years, net_margin, marker='s', linewidth=2, markersize=8, label='Net Margin', color=style['colors'][2])
+    ax3.set_title('Profit Margins', fontsize=14, fontweight='bold')
+    ax3.set_ylabel('Percentage (%)', fontsize=10)
+    ax3.legend(fontsize=9)
+    ax3.grid(True, alpha=0.3)
+
+    # Panel 4: Key Metrics Summary (Text)
+    ax4 = fig.add_subplot(gs[1, 1])
+    ax4.axis('off')
+
+    first, last = years.iloc[0], years.iloc[-1]
+    summary_text = f"""
 KEY METRICS SUMMARY
 
-Revenue CAGR (2023-2025):
-    {(((revenue.iloc[-1] / revenue.iloc[0]) ** (1/2)) - 1) * 100:.2f}%
+Revenue CAGR ({first}-{last}):
+    {df[REVENUE_CAGR].iloc[-1]:.2f}%
 
-FY 2025 Performance:
+FY {last} Performance:
     Revenue: KShs {revenue.iloc[-1]:,.0f}M
     EBITDA: KShs {df.iloc[-1]['EBITDA (KShs M)']:,.0f}M
     Net Profit: KShs {net_profit.iloc[-1]:,.0f}M
 
-Margins (FY 2025):
+Margins (FY {last}):
     EBITDA Margin: {ebitda_margin.iloc[-1]:.2f}%
     Net Margin: {net_margin.iloc[-1]:.2f}%
 
-Growth (2024→2025):
-    Revenue: {revenue_growth[-1]:+.2f}%
-    Net Profit: {profit_growth[-1]:+.2f}%
+Growth ({last - 1}→{last}):
+    Revenue: {df[REVENUE_GROWTH].iloc[-1]:+.2f}%
+    Net Profit: {df[PROFIT_GROWTH].iloc[-1]:+.2f}%
 """
 
-ax4.text(0.1, 0.5, summary_text, fontsize=11, family='monospace', 
-         verticalalignment='center', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-
-fig.suptitle('Safaricom PLC - Financial Performance Dashboard (FY 2023-2025)', 
-             fontsize=18, fontweight='bold', y=0.98)
-
-plt.savefig(f'{viz_dir}/5_dashboard.png', dpi=300, bbox_inches='tight')
-print("✓ Created: 5_dashboard.png")
-plt.close()
-
-print("\n" + "="*70)
-print(f"✓ All visualizations saved to: {viz_dir}/")
-print("="*70)
-print("\nGenerated files:")
-print("  1. 1_revenue_trend.png - Revenue growth over 3 years")
-print("  2. 2_profitability_metrics.png - EBITDA, Operating Profit, Net Profit")
-print("  3. 3_profit_margins.png - EBITDA and Net Profit margins")
-print("  4. 4_growth_rates.png - Year-over-year growth rates")
-print("  5. 5_dashboard.png - Comprehensive dashboard")
-print("="*70 + "\n")
+    ax4.text(0.1, 0.5, summary_text, fontsize=11, family='monospace',
+             verticalalignment='center', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
+
+    fig.suptitle(f'{company} - Financial Performance Dashboard ({_year_range(years)})',
+                 fontsize=18, fontweight='bold', y=0.98)
+    return fig
+
+
+REVENUE = ['Fiscal Year', 'Total Revenue (KShs M)']
+PROFITS = ['Fiscal Year', 'EBITDA (KShs M)', 'Operating Profit (KShs M)', 'Net Profit (KShs M)']
+MARGINS = ['Fiscal Year', 'EBITDA Margin (%)', 'Net Margin (%)']
+GROWTH = ['Fiscal Year', REVENUE_GROWTH, PROFIT_GROWTH]
+DASHBOARD = ['Fiscal Year', 'Total Revenue (KShs M)', 'EBITDA (KShs M)', 'Net Profit (KShs M)',
+             'EBITDA Margin (%)', 'Net Margin (%)', REVENUE_GROWTH, PROFIT_GROWTH, REVENUE_CAGR]
+
+# Output file -> (plotting function, columns it reads, description)
+CHARTS = {
+    '1_revenue_trend.png': (plot_revenue_trend, REVENUE, 'Revenue growth over time'),
+    '2_profitability_metrics.png': (plot_profitability_metrics, PROFITS, 'EBITDA, Operating Profit, Net Profit'),
+    '3_profit_margins.png': (plot_profit_margins, MARGINS, 'EBITDA and Net Profit margins'),
+    '4_growth_rates.png': (plot_growth_rates, GROWTH, 'Year-over-year growth rates'),
+    '5_dashboard.png': (plot_dashboard, DASHBOARD, 'Comprehensive dashboard'),
+}
+
+
+def chart_columns():
+    """Every column some chart reads, in first-use order"""
+    return list(dict.fromkeys(column for _, columns, _ in CHARTS.values() for column in columns))
+
+
+def chart_frame(metrics):
+    """The charted columns of a metrics frame, with display names for the companies"""
+    df = metrics.reindex(columns=['Company', *chart_columns()])
+    df['Company'] = df['Company'].map(lambda ticker: COMPANY_NAMES.get(ticker, ticker))
+    return df
+
+
+def load_data(companies=None):
+    """Analysis rows and metrics of the chosen tickers (all by default)"""
+    metrics = load_metrics()
+    if companies is not None:
+        metrics = metrics[metrics['Company'].isin(companies)]
+    return chart_frame(metrics)
+
+
+def chart_hash(chart, company, df, style=STYLE):
+    """Hash of everything that determines one chart's pixels
+
+    Only the columns the chart reads are hashed, so a change to one metric
+    leaves charts that do not plot it alone; any edit to this module's
+    drawing code changes every hash.
+    """
+    _, columns, _ = CHARTS[chart]
+    digest = hashlib.sha256()
+    digest.update(f'{chart}\0{company}\0{CODE_VERSION}\0'.encode())
+    digest.update(json.dumps(style, sort_keys=True).encode())
+    digest.update(df[columns].to_csv(index=False).encode())
+    return digest.hexdigest()
+
+
+def render_chart(chart, company, df, path, style=STYLE):
+    """Draw and save one chart; runs in a worker process"""
+    plot, _, _ = CHARTS[chart]
+    start = time.perf_counter()
+    with span('render_chart', 'render', chart=chart, company=company), plt.style.context(style['style']):
+        fig = plot(df, company, style)
+        fig.savefig(path, dpi=style['dpi'], bbox_inches='tight')
+        plt.close(fig)
+    return path, time.perf_counter() - start
+
+
+def company_frames(df):
+    """{company: frame sorted by year}; a frame without a Company column is one company"""
+    if 'Company' not in df.columns:
+        return {DEFAULT_COMPANY: df.sort_values('Fiscal Year').reset_index(drop=True)}
+    return {
+        company: group.drop(columns='Company').sort_values('Fiscal Year').reset_index(drop=True)
+        for company, group in df.groupby('Company', sort=True)
+    }
+
+
+def output_dir(company, companies, out_dir=viz_dir):
+    """Charts for a single company go straight into out_dir, otherwise one folder per company"""
+    if len(companies) == 1:
+        return out_dir
+    return os.path.join(out_dir, re.sub(r'[^a-z0-9]+', '_', company.lower()).strip('_'))
+
+
+def load_state(out_dir=viz_dir):
+    try:
+        with open(os.path.join(out_dir, state_file)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(state, out_dir=viz_dir):
+    path = os.path.join(out_dir, state_file)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def render_all(df, out_dir=viz_dir, workers=None, force=False, style=STYLE):
+    """Render every chart for every company, skipping charts whose hash is unchanged
+
+    Returns (rendered [(path, seconds)], skipped [path]).
+    """
+    frames = company_frames(df)
+    state = load_state(out_dir)
+
+    jobs = []
+    skipped = []
+    for company, frame in frames.items():
+        target_dir = output_dir(company, frames, out_dir)
+        os.makedirs(target_dir, exist_ok=True)
+        for chart in CHARTS:
+            path = os.path.join(target_dir, chart)
+            key = chart_hash(chart, company, frame, style)
+            if not force and state.get(path) == key and os.path.exists(path):
+                skipped.append(path)
+                continue
+            jobs.append((chart, company, frame, path, key))
+
+    rendered = []
+    if workers == 1 or len(jobs) <= 1:
+        for chart, company, frame, path, key in jobs:
+            rendered.append(render_chart(chart, company, frame, path, style))
+            state[path] = key
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            futures = {
+                pool.submit(render_chart, chart, company, frame, path, style): (path, key)
+                for chart, company, frame, path, key in jobs
+            }
+            # Results are collected in submission order; the pool still renders concurrently
+            for future, (path, key) in futures.items():
+                rendered.append(future.result())
+                state[path] = key
+
+    save_state(state, out_dir)
+    return rendered, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the analysis charts")
+    parser.add_argument('--companies', nargs='*', default=None,
+                        help="tickers to chart (default: every company in the processed store)")
+    parser.add_argument('--data', default=None,
+                        help="analysis CSV to chart instead of the store; a Company column renders "
+                             "one set of charts per company")
+    parser.add_argument('--out-dir', default=viz_dir)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="render processes (0 = one per CPU core, 1 = in this process)")
+    parser.add_argument('--force', action='store_true', help="redraw charts even if unchanged")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("CREATING VISUALIZATIONS")
+    print("="*70)
+
+    # Read the processed data
+    if args.data:
+        df = pd.read_csv(args.data)
+        df['Fiscal Year'] = df['Fiscal Year'].astype(int)
+        df = chart_frame(Analytics(FactTable.from_wide(df, company=DEFAULT_COMPANY)).metrics())
+    else:
+        df = load_data(args.companies)
+
+    start = time.perf_counter()
+    rendered, skipped = render_all(df, args.out_dir, workers=args.workers, force=args.force)
+    elapsed = time.perf_counter() - start
+
+    for path, seconds in rendered:
+        print(f"✓ Created: {path} ({seconds:.2f}s)")
+    for path in skipped:
+        print(f"- Unchanged: {path}")
+
+    print("\n" + "="*70)
+    print(f"✓ {len(rendered)} charts rendered, {len(skipped)} unchanged, in {elapsed:.2f}s")
+    print(f"✓ All visualizations saved to: {args.out_dir}/")
+    print("="*70)
+    print("\nGenerated files:")
+    for i, (chart, (_, _, description)) in enumerate(CHARTS.items(), 1):
+        print(f"  {i}. {chart} - {description}")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import select
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from db import CHANGE_CHANNEL, DATABASE_URL, get_engine, is_sqlite, sqlite_path
+from facts import FactTable
+from line_items import match_line_items
+
+# Canonical income statement metrics the dashboard charts
+DASHBOARD_LINE_ITEMS = [
+    'Total Revenue',
+    'Direct Costs',
+    'EBITDA',
+    'Operating Profit',
+    'Profit Before Tax',
+    'Net Profit',
+]
+
+INCOME_LINES_SQL = """
+    SELECT p.fiscal_year, s.line_item, s.value_kshs_millions AS value
+    FROM income_statement s
+    JOIN financial_periods p ON p.period_id = s.period_id
+    JOIN companies c ON c.company_id = p.company_id
+    WHERE c.ticker = :ticker
+    ORDER BY p.fiscal_year, s.id
+"""
+
+
+class ChangeWatcher:
+    """Background thread that bumps `version` whenever the database reports new data
+
+    On Postgres it LISTENs on the channel the loader NOTIFYs after each commit.
+    SQLite has no notifications, so a dedicated connection polls PRAGMA
+    data_version, which changes only when another connection commits.
+    """
+
+    def __init__(self, url=None, poll_interval=2.0):
+        self.url = url or DATABASE_URL
+        self.poll_interval = poll_interval
+        self.version = 0
+        target = self._poll_sqlite if is_sqlite(self.url) else self._listen_postgres
+        self._thread = threading.Thread(target=target, name="db-change-watcher", daemon=True)
+        self._thread.start()
+
+    def _bump(self):
+        self.version += 1
+
+    def _listen_postgres(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        while True:
+            try:
+                conn = psycopg2.connect(self.url)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {CHANGE_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self._bump()
+            except psycopg2.Error:
+                # Notifications sent while disconnected are lost, so assume a change
+                self._bump()
+                time.sleep(self.poll_interval)
+
+    def _poll_sqlite(self):
+        conn = sqlite3.connect(sqlite_path(self.url), check_same_thread=False)
+        last = conn.execute("PRAGMA data_version").fetchone()[0]
+        while True:
+            time.sleep(self.poll_interval)
+            current = conn.execute("PRAGMA data_version").fetchone()[0]
+            if current != last:
+                last = current
+                self._bump()
+
+
+class QueryCache:
+    """Read-through cache of query results, valid until the watcher sees a change
+
+    Results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, url=None, poll_interval=2.0):
+        self.engine = get_engine(url)
+        self.watcher = ChangeWatcher(url, poll_interval)
+        self.queries = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.watcher.version
+
+    def read(self, sql, **params):
+        key = (sql, tuple(sorted(params.items())))
+        version = self.watcher.version
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        with self.engine.connect() as conn:
+            frame = pd.read_sql(text(sql), conn, params=params)
+        with self._lock:
+            self.queries += 1
+            self._results[key] = (version, frame)
+        return frame
+
+
+def income_facts(cache, ticker='SCOM'):
+    """FactTable of one company's income statement lines matched to canonical metrics"""
+    lines = cache.read(INCOME_LINES_SQL, ticker=ticker)
+    metrics = match_line_items(lines['line_item'], 'income_statement')
+    facts = lines.assign(company=ticker, statement='income_statement', line_item=metrics)
+    facts = facts.dropna(subset=['line_item', 'value']).drop_duplicates(['fiscal_year', 'line_item'])
+    return FactTable(facts.astype({'value': float}))
+
+
+def income_frame(cache, ticker='SCOM'):
+    """Wide frame of the dashboard's income statement metrics, one row per fiscal year"""
+    return income_facts(cache, ticker).wide(DASHBOARD_LINE_ITEMS, company=ticker)
@@ -1,55 +1,65 @@
-import pdfplumber
+import argparse
 import os
 
-# Get the PDF files
+from page_cache import PageTextCache
+from statement_scan import scan_reports
+
 raw_data_dir = "data/raw"
-pdf_files = sorted([f for f in os.listdir(raw_data_dir) if f.endswith('.pdf')])
-
-print(f"Found {len(pdf_files)} PDF files:")
-for i, pdf_file in enumerate(pdf_files, 1):
-    print(f"  {i}. {pdf_file}")
-
-# Explore each PDF
-for pdf_file in pdf_files:
-    pdf_path = os.path.join(raw_data_dir, pdf_file)
-    print(f"\n{'='*70}")
-    print(f"Exploring: {pdf_file}")
-    print('='*70)
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"Total pages: {len(pdf.pages)}\n")
-        
-        found_statements = []
-        
-        # Search through ALL pages
-        for page_num in range(len(pdf.pages)):
-            page = pdf.pages[page_num]
-            text = page.extract_text()
-            
-            if text:
-                text_lower = text.lower()
-                
-                # Look for specific financial statement keywords
-                if 'consolidated statement of comprehensive income' in text_lower:
-                    found_statements.append((page_num + 1, 'Income Statement'))
-                elif 'consolidated statement of financial position' in text_lower:
-                    found_statements.append((page_num + 1, 'Balance Sheet'))
-                elif 'consolidated statement of cash flows' in text_lower:
-                    found_statements.append((page_num + 1, 'Cash Flow Statement'))
-        
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find financial statement pages in the annual reports")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for the page scan (0 = one per CPU core)")
+    parser.add_argument('--shard-size', type=int, default=25,
+                        help="pages per work unit when scanning in parallel")
+    parser.add_argument('--header-band', type=float, default=None,
+                        help="fast mode: only read the top fraction of each page (e.g. 0.25)")
+    parser.add_argument('--max-rss-mb', type=int, default=None,
+                        help="reopen a report when a scanning process passes this much resident memory")
+    args = parser.parse_args()
+
+    # Get the PDF files
+    pdf_files = sorted([f for f in os.listdir(raw_data_dir) if f.endswith('.pdf')])
+
+    print(f"Found {len(pdf_files)} PDF files:")
+    for i, pdf_file in enumerate(pdf_files, 1):
+        print(f"  {i}. {pdf_file}")
+
+    # Page text is cached on disk, so unchanged reports never reach pdfplumber again
+    pdf_paths = [os.path.join(raw_data_dir, pdf_file) for pdf_file in pdf_files]
+    results, stats = scan_reports(
+        pdf_paths, workers=args.workers, shard_size=args.shard_size, header_band=args.header_band,
+        max_rss_mb=args.max_rss_mb
+    )
+
+    # Explore each PDF
+    for pdf_file, pdf_path in zip(pdf_files, pdf_paths):
+        report = results[pdf_path]
+        print(f"\n{'='*70}")
+        print(f"Exploring: {pdf_file}")
+        print('='*70)
+        print(f"Total pages: {report['page_count']}\n")
+
         # Print findings
-        if found_statements:
+        if report['found']:
             print("Financial Statements Found:")
-            for page_num, statement_type in found_statements:
+            for page_num, statement_type in report['found']:
                 print(f"  - PAGE {page_num}: {statement_type}")
         else:
             print("No clear financial statements found. Searching for 'notes' section...")
             # Sometimes statements are in the notes section
-            for page_num in range(len(pdf.pages)):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-                if text and 'notes to the financial statements' in text.lower():
-                    print(f"  - PAGE {page_num + 1}: Notes to Financial Statements")
-                    break
-        
+            if report['notes_page']:
+                print(f"  - PAGE {report['notes_page']}: Notes to Financial Statements")
+
         print()
+
+    # Each worker counts its own hits and misses; fold them into one cache's summary
+    cache = PageTextCache()
+    cache.hits, cache.misses = stats['hits'], stats['misses']
+    print(cache.stats())
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,44 @@
-import pdfplumber
 import pandas as pd
-import re
 import os
 
+from page_cache import PageTextCache
+from statement_text import resolve_metrics, tokenize
+
 raw_data_dir = "data/raw"
 extracted_dir = "data/extracted"
 os.makedirs(extracted_dir, exist_ok=True)
 
-def clean_value(val):
-    """Clean financial values"""
-    if not val or val == '':
-        return None
-    val = str(val).strip().replace(',', '')
-    if '(' in val:
-        val = '-' + val.replace('(', '').replace(')', '')
-    try:
-        return float(val)
-    except:
-        return None
+# Metric -> the line item name written to the CSV
+OUTPUT_LABELS = {
+    'Revenue from Contracts': 'Revenue from contracts with customers',
+    'Total Revenue': 'Total revenue',
+    'EBITDA': 'EBITDA',
+    'Operating Profit': 'Operating profit (EBIT)',
+    'Net Profit': 'Profit for the year',
+}
 
 def extract_income_statement_2025():
     """Special extraction for 2025 since table structure is different"""
     pdf_path = os.path.join(raw_data_dir, "Safaricom Annual-2025-Reporrt.pdf")
     
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[200]  # Page 201
-        text = page.extract_text()
-        
-        # Parse the text to extract key metrics
-        lines = text.split('\n')
-        
-        data = []
-        for i, line in enumerate(lines):
-            if 'Revenue from contracts with customers' in line:
-                # Find the numbers on following lines
-                numbers = []
-                for j in range(i, min(i+5, len(lines))):
-                    matches = re.findall(r'[\d,]+\.?\d*', lines[j])
-                    numbers.extend(matches)
-                
-                if len(numbers) >= 4:
-                    data.append(['Revenue from contracts with customers', '5(a)', 
-                                numbers[0], numbers[1], numbers[2], numbers[3]])
-            
-            elif 'Total revenue' in line and 'from' not in line.lower():
-                numbers = []
-                for j in range(i, min(i+3, len(lines))):
-                    matches = re.findall(r'[\d,]+\.?\d*', lines[j])
-                    numbers.extend(matches)
-                if len(numbers) >= 4:
-                    data.append(['Total revenue', '', numbers[0], numbers[1], numbers[2], numbers[3]])
-            
-            elif 'EBITDA' in line or 'Earnings before interest' in line:
-                numbers = []
-                for j in range(i, min(i+3, len(lines))):
-                    matches = re.findall(r'[\d,]+\.?\d*', lines[j])
-                    numbers.extend(matches)
-                if len(numbers) >= 4:
-                    data.append(['EBITDA', '', numbers[0], numbers[1], numbers[2], numbers[3]])
-            
-            elif 'Operating profit' in line and 'EBIT' in line:
-                numbers = []
-                for j in range(i, min(i+3, len(lines))):
-                    matches = re.findall(r'[\(]?[\d,]+\.?\d*[\)]?', lines[j])
-                    numbers.extend(matches)
-                if len(numbers) >= 4:
-                    data.append(['Operating profit (EBIT)', '', numbers[0], numbers[1], numbers[2], numbers[3]])
-            
-            elif 'Profit for the year' in line and 'attributable' not in line.lower():
-                numbers = []
-                for j in range(i, min(i+3, len(lines))):
-                    matches = re.findall(r'[\(]?[\d,]+\.?\d*[\)]?', lines[j])
-                    numbers.extend(matches)
-                if len(numbers) >= 4:
-                    data.append(['Profit for the year', '', numbers[0], numbers[1], numbers[2], numbers[3]])
-        
-        # Create DataFrame
-        df = pd.DataFrame(data, columns=['Line Item', 'Notes', 'GROUP 2025', 'GROUP 2024', 'COMPANY 2025', 'COMPANY 2024'])
-        
-        return df
+    cache = PageTextCache()
+    text = cache.get_texts(pdf_path, [200])[200]  # Page 201
+    cache.close()
+    
+    # Tokenize the page once, then pick out the key metrics with all four columns,
+    # keeping the amounts as printed
+    resolved = resolve_metrics(tokenize(text), min_amounts=4, parse=False)
+    
+    data = []
+    for metric, line_item in OUTPUT_LABELS.items():
+        if metric in resolved:
+            label, note, amounts = resolved[metric]
+            data.append([line_item, note] + amounts[:4])
+    
+    # Create DataFrame
+    df = pd.DataFrame(data, columns=['Line Item', 'Notes', 'GROUP 2025', 'GROUP 2024', 'COMPANY 2025', 'COMPANY 2024'])
+    
+    return df
 
 # Main extraction
 print("\n" + "="*70)
@@ -0,0 +1,159 @@
+import pandas as pd
+
+import processed_store
+from line_items import TAXONOMY
+
+# Amounts are KShs millions; wide frames label each line item with the unit
+UNIT_SUFFIX = " (KShs M)"
+DEFAULT_STATEMENT = "income_statement"
+
+DIMENSIONS = ["company", "fiscal_year", "statement", "line_item"]
+FACT_DTYPES = {
+    "company": "category",
+    "fiscal_year": "int16",
+    "statement": "category",
+    "line_item": "category",
+    "value": "float64",
+}
+# Wide frames use the scripts' column names for the two key dimensions
+WIDE_KEYS = {"company": "Company", "fiscal_year": "Fiscal Year"}
+
+
+def column_name(line_item):
+    return f"{line_item}{UNIT_SUFFIX}"
+
+
+def line_item_name(column):
+    return column[:-len(UNIT_SUFFIX)] if column.endswith(UNIT_SUFFIX) else column
+
+
+class FactTable:
+    """One value per (company, fiscal_year, statement, line_item)
+
+    Facts are a float Series on a sorted MultiIndex of categorical (and int16
+    year) levels, so a slice by company and year is a binary search rather
+    than a scan, and a new line item is a new category, not a new column.
+    Missing values are kept as NaN facts, so saving a year whose values are
+    all missing still replaces what was stored for it. `wide()` pivots back
+    to the 'Fiscal Year' / 'Total Revenue (KShs M)' layout the scripts print
+    and plot.
+    """
+
+    def __init__(self, facts):
+        """`facts` is a long frame with the DIMENSIONS columns and a value column"""
+        facts = facts[DIMENSIONS + ["value"]].astype(FACT_DTYPES)
+        data = facts.set_index(DIMENSIONS)["value"].sort_index()
+        self.data = data.set_axis(data.index.remove_unused_levels())
+
+    @classmethod
+    def from_wide(cls, frame, statement=DEFAULT_STATEMENT, company=processed_store.DEFAULT_COMPANY):
+        """Facts of a wide frame with a 'Fiscal Year' column and one column per line item
+
+        A 'Company' column, if present, overrides `company` row by row.
+        """
+        frame = frame.rename(columns={v: k for k, v in WIDE_KEYS.items()})
+        if "company" not in frame.columns:
+            frame = frame.assign(company=company)
+        long = frame.melt(id_vars=list(WIDE_KEYS), var_name="line_item", value_name="value")
+        long["line_item"] = long["line_item"].map(line_item_name)
+        return cls(long.assign(statement=statement))
+
+    @classmethod
+    def load(cls, table, companies=None, years=None, line_items=None, root=processed_store.store_dir):
+        """Facts of one processed table; partitions and line items not asked for are never read"""
+        return cls(processed_store.read_table(table, companies=companies, years=years,
+                                              line_items=line_items, root=root))
+
+    def save(self, table, root=processed_store.store_dir):
+        """Write to a processed table, replacing the (company, year) partitions covered"""
+        return processed_store.write_table(self.to_frame(), table, root)
+
+    @classmethod
+    def concat(cls, tables):
+        """Facts of several tables; where two hold the same fact, the earlier table's value wins
+
+        A missing value gives way to the same fact from a later table.
+        """
+        facts = pd.concat([table.to_frame() for table in tables], ignore_index=True)
+        facts = facts.sort_values("value", key=lambda values: values.isna(), kind="stable")
+        return cls(facts.drop_duplicates(DIMENSIONS, keep="first"))
+
+    def __len__(self):
+        return len(self.data)
+
+    def _level(self, name):
+        index = self.data.index
+        return index.levels[index.names.index(name)]
+
+    @property
+    def companies(self):
+        return list(self._level("company"))
+
+    @property
+    def years(self):
+        return [int(y) for y in self._level("fiscal_year")]
+
+    @property
+    def line_items(self):
+        return list(self._level("line_item"))
+
+    def to_frame(self):
+        """Long frame with one column per dimension, as stored on disk"""
+        return self.data.reset_index()
+
+    def memory_usage(self):
+        return int(self.data.memory_usage(index=True, deep=True))
+
+    def select(self, companies=None, years=None, statements=None, line_items=None):
+        """Sub-table by any combination of dimensions
+
+        `years` may be a list or a (first, last) tuple. Keys absent from the
+        table are ignored rather than raising.
+        """
+        def keys(name, wanted):
+            if wanted is None:
+                return slice(None)
+            present = set(self._level(name))
+            return [key for key in wanted if key in present]
+
+        if isinstance(years, tuple):
+            year_key = slice(*years)
+        else:
+            year_key = keys("fiscal_year", None if years is None else [int(y) for y in years])
+        key = (keys("company", companies), year_key, keys("statement", statements),
+               keys("line_item", line_items))
+        if any(isinstance(k, list) and not k for k in key):
+            subset = self.data.iloc[:0]
+        else:
+            subset = self.data.loc[key]
+        table = FactTable.__new__(FactTable)
+        table.data = subset.set_axis(subset.index.remove_unused_levels())
+        return table
+
+    def wide(self, line_items=None, statement=DEFAULT_STATEMENT, company=None):
+        """One row per (Company, Fiscal Year), one '<item> (KShs M)' column per line item
+
+        With `company` the rows of that company alone are returned, without
+        the Company column. Requested line items with no facts come back as
+        NaN columns, in the order asked for; by default every line item is
+        returned in taxonomy order.
+        """
+        table = self.select(companies=None if company is None else [company],
+                            statements=[statement], line_items=line_items)
+        if line_items is None:
+            known = list(TAXONOMY.get(statement, {}))
+            present = table.line_items
+            line_items = [item for item in known if item in present] + sorted(set(present) - set(known))
+        wide = table.data.droplevel("statement").unstack("line_item")
+        wide.columns = wide.columns.astype(str)
+        wide = wide.reindex(columns=list(line_items))
+        wide = wide.rename(columns=column_name).rename_axis(columns=None).reset_index()
+        wide = wide.rename(columns=WIDE_KEYS).astype({"Company": str, "Fiscal Year": int})
+        if company is not None:
+            wide = wide.drop(columns="Company")
+        return wide
+
+    def panel(self, line_item, statement=DEFAULT_STATEMENT):
+        """Fiscal years by companies for one line item, for cross-company comparisons"""
+        series = self.data.xs((statement, line_item), level=("statement", "line_item"))
+        return series.unstack("company").rename_axis(index="Fiscal Year", columns="Company")
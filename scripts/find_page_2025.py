@@ -1,21 +1,45 @@
-import pdfplumber
+from page_analysis import PageAnalysis
+from page_cache import PageTextCache
+from page_stream import iter_pages
 
 pdf_path = "data/raw/Safaricom Annual-2025-Reporrt.pdf"
 
-with pdfplumber.open(pdf_path) as pdf:
-    # Search pages 195-205 more carefully
-    for page_num in range(194, 205):
-        page = pdf.pages[page_num]
-        text = page.extract_text()
-        
-        if text and 'revenue from contracts with customers' in text.lower():
-            # Also check for the actual financial numbers
-            if '384,433' in text or '373,492' in text:  # 2025 revenue numbers we saw earlier
-                print(f"\n✓ Found correct Income Statement on PAGE {page_num + 1}")
-                print("\nFirst 1000 characters:")
-                print(text[:1000])
-                
-                # Also extract table to verify
-                tables = page.extract_tables()
-                print(f"\nNumber of tables found: {len(tables)}")
-                break
+cache = PageTextCache()
+
+
+def is_income_statement(text):
+    # Also check for the actual financial numbers
+    return (bool(text) and 'revenue from contracts with customers' in text.lower()
+            and ('384,433' in text or '373,492' in text))  # 2025 revenue numbers we saw earlier
+
+
+# Tables of the matched page, taken from the same layout pass as its text
+page_tables = {}
+
+
+def analyse(page):
+    analysis = PageAnalysis(page)
+    text = analysis.text  # same text as page.extract_text(), so it shares its cache entries
+    if is_income_statement(text):
+        page_tables[page.page_number - 1] = analysis.tables()
+    return text
+
+
+# Search pages 195-205 more carefully
+page_texts = cache.get_texts(pdf_path, range(194, 205), extract=analyse)
+
+for page_num, text in page_texts.items():
+    if is_income_statement(text):
+        print(f"\n✓ Found correct Income Statement on PAGE {page_num + 1}")
+        print("\nFirst 1000 characters:")
+        print(text[:1000])
+
+        # Also extract table to verify; a cached page is laid out here for the first time
+        if page_num not in page_tables:
+            for _, page in iter_pages(pdf_path, [page_num]):
+                page_tables[page_num] = PageAnalysis(page).tables()
+        print(f"\nNumber of tables found: {len(page_tables[page_num])}")
+        break
+
+print(f"\n{cache.stats()}")
+cache.close()
@@ -0,0 +1,283 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from batch_extract import CELL_DTYPES, STATEMENTS, dataset_path, extract_statement_cells, write_dataset
+from job_queue import DEFAULT_LEASE_SECONDS, open_queue, queue_url
+from page_cache import PageTextCache, file_hash
+from statement_locator import locate_statements, report_year
+from table_region import load_profiles
+
+raw_data_dir = "data/raw"
+# Finished statement extractions, one Parquet file per (report hash, statement).
+# A directory queue keeps them under its own root instead, where every machine
+# sharing the queue can reach them.
+parts_dir = "data/extracted/parts"
+
+# Reports directly in data/raw belong to this company; data/raw/<TICKER>/ holds the rest
+DEFAULT_COMPANY = "SCOM"
+
+LOCATE, EXTRACT = "locate", "extract"
+
+
+def discover_reports(raw_dir=raw_data_dir):
+    """(company, pdf_path) for every report under raw_dir"""
+    reports = []
+    for entry in sorted(os.listdir(raw_dir)):
+        path = os.path.join(raw_dir, entry)
+        if entry.endswith('.pdf'):
+            reports.append((DEFAULT_COMPANY, path))
+        elif os.path.isdir(path):
+            reports.extend(
+                (entry, os.path.join(path, name))
+                for name in sorted(os.listdir(path)) if name.endswith('.pdf')
+            )
+    return reports
+
+
+def default_parts_dir(url=None):
+    """Where workers write extraction parts: under the root of a directory queue, else parts_dir"""
+    url = url or queue_url
+    if url.startswith("dir:///"):
+        return os.path.join(url[len("dir:///"):], "parts")
+    return parts_dir
+
+
+def enqueue_reports(queue, raw_dir=raw_data_dir):
+    """One locate job per report, keyed on its content hash; returns how many were new
+
+    Reports are recorded relative to raw_dir, so workers on other machines
+    find them under their own copy or mount of it.
+    """
+    added = 0
+    for company, pdf_path in discover_reports(raw_dir):
+        sha256 = file_hash(pdf_path)
+        added += queue.enqueue(LOCATE, sha256, {
+            'company': company,
+            'source': os.path.relpath(pdf_path, raw_dir),
+            'report': os.path.basename(pdf_path),
+            'sha256': sha256,
+            'year': report_year(os.path.basename(pdf_path)),
+        })
+    return added
+
+
+def part_name(sha256, statement):
+    return f"{sha256}-{statement}.parquet"
+
+
+def report_path(payload, raw_dir=raw_data_dir):
+    """The report a job reads, under this worker's raw directory"""
+    if 'source' in payload:
+        return os.path.join(raw_dir, payload['source'])
+    return payload['pdf_path']  # queued before reports were recorded relative to raw_dir
+
+
+def run_locate(queue, payload, cache, raw_dir=raw_data_dir):
+    """Find a report's statement pages and queue one extract job per statement found"""
+    entry = locate_statements(report_path(payload, raw_dir), cache)
+    for statement in STATEMENTS:
+        if entry.get(statement) is not None:
+            queue.enqueue(EXTRACT, f"{payload['sha256']}-{statement}",
+                          dict(payload, statement=statement, page=entry[statement],
+                               region=entry['regions'].get(statement)))
+    return entry
+
+
+def run_extract(payload, directory=parts_dir, raw_dir=raw_data_dir):
+    """Extract one statement table and checkpoint it as a Parquet part in `directory`
+
+    The part is written before the job is marked done, and rewriting it is
+    harmless, so a worker dying in between only costs a repeat of this one job.
+    The result names the part relative to `directory`.
+    """
+    cells = extract_statement_cells(report_path(payload, raw_dir), payload['page'], payload['statement'],
+                                    payload.get('region'), load_profiles())
+    frame = pd.DataFrame(cells, columns=['row', 'col', 'cell'])
+    frame = frame.assign(
+        report=payload['report'],
+        year=int(payload['year'] or 0),
+        statement=payload['statement'],
+        page=payload['page'],
+    )[list(CELL_DTYPES)].astype(CELL_DTYPES)
+    frame.insert(0, 'company', pd.Categorical([payload['company']] * len(frame)))
+
+    os.makedirs(directory, exist_ok=True)
+    name = part_name(payload['sha256'], payload['statement'])
+    path = os.path.join(directory, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return {'part': name, 'cells': len(frame)}
+
+
+def _keep_leased(url, job, lease_seconds, stop):
+    """Heartbeat from a separate connection while the job runs"""
+    queue = open_queue(url)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(job, lease_seconds):
+                break
+    finally:
+        queue.close()
+
+
+def work(url=None, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, idle_exit=True, poll=5.0,
+         raw_dir=raw_data_dir, directory=None):
+    """Claim and run jobs until the queue is drained (or forever with idle_exit=False)
+
+    Reports are read under `raw_dir` and parts written to `directory`
+    (default_parts_dir of the queue when not given). Returns the number of
+    jobs this worker finished.
+    """
+    url = url or queue_url
+    directory = directory or default_parts_dir(url)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue = open_queue(url)
+    cache = PageTextCache()
+    finished = 0
+    try:
+        while True:
+            job = queue.claim(worker_id, lease_seconds)
+            if job is None:
+                # Another worker may still be locating a report and about to add extract jobs
+                counts = queue.counts()
+                busy = any(states['pending'] or states['running'] for states in counts.values())
+                if idle_exit and not busy:
+                    return finished
+                time.sleep(poll)
+                continue
+
+            stop = threading.Event()
+            beat = threading.Thread(target=_keep_leased, args=(url, job, lease_seconds, stop), daemon=True)
+            beat.start()
+            try:
+                if job['kind'] == LOCATE:
+                    result = run_locate(queue, job['payload'], cache, raw_dir)
+                elif job['kind'] == EXTRACT:
+                    result = run_extract(job['payload'], directory, raw_dir)
+                else:
+                    raise ValueError(f"Unknown job kind: {job['kind']}")
+            except Exception as e:
+                stop.set()
+                beat.join()
+                queue.fail(job, f"{type(e).__name__}: {e}")
+                print(f"✗ {worker_id}: {job['kind']} {job['key']} failed: {e}")
+                continue
+            # A heartbeat in flight holds the job file, so let it finish first
+            stop.set()
+            beat.join()
+            if queue.complete(job, result):
+                finished += 1
+                print(f"✓ {worker_id}: {job['kind']} {job['payload']['report']}"
+                      + (f" {job['payload']['statement']}" if job['kind'] == EXTRACT else ''))
+    finally:
+        cache.close()
+        queue.close()
+
+
+def collect(queue, path=dataset_path, directory=parts_dir):
+    """Merge every finished extraction part in `directory` into the cell dataset
+
+    Raises FileNotFoundError naming the missing parts if any finished job's
+    part cannot be found, rather than saving a dataset without them.
+    """
+    parts = [
+        os.path.join(directory, result['part']) if 'part' in result else result['path']
+        for result in queue.results(EXTRACT).values()
+    ]
+    missing = sorted(p for p in parts if not os.path.exists(p))
+    if missing:
+        raise FileNotFoundError(
+            f"{len(missing)} of {len(parts)} finished extractions have no part in {directory}: "
+            + ', '.join(missing[:5]) + (' ...' if len(missing) > 5 else '')
+        )
+    if not parts:
+        return 0
+    cells = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    for column in ('company', 'report', 'statement'):
+        cells[column] = cells[column].astype('category')
+    cells = cells.sort_values(['company', 'report', 'statement', 'row', 'col'], ignore_index=True)
+    write_dataset(cells, path)
+    return len(cells)
+
+
+def print_status(queue):
+    print(f"{'kind':<10} {'pending':>8} {'running':>8} {'done':>8} {'failed':>8}")
+    for kind, states in sorted(queue.counts().items()):
+        print(f"{kind:<10} {states['pending']:>8} {states['running']:>8} {states['done']:>8} {states['failed']:>8}")
+    for kind, key, error in queue.errors():
+        print(f"✗ {kind} {key}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue-based, resumable ingestion of annual reports")
+    parser.add_argument('--queue', default=queue_url,
+                        help="sqlite:///path (one machine) or dir:///path (directory shared by several)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_cmd = commands.add_parser('enqueue', help="queue every report under the raw directory")
+    enqueue_cmd.add_argument('--raw-dir', default=raw_data_dir)
+    parts_help = "directory of extraction parts (default: parts/ under a dir:/// queue, else " + parts_dir + ")"
+
+    work_cmd = commands.add_parser('work', help="run workers until the queue is drained")
+    work_cmd.add_argument('--workers', type=int, default=1, help="worker processes on this machine")
+    work_cmd.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS,
+                          help="seconds before a silent worker's job is handed to another")
+    work_cmd.add_argument('--forever', action='store_true', help="keep polling for new jobs")
+    work_cmd.add_argument('--raw-dir', default=raw_data_dir, help="this machine's copy or mount of the reports")
+    work_cmd.add_argument('--parts-dir', help=parts_help)
+
+    commands.add_parser('status', help="job counts per kind and state")
+    commands.add_parser('retry', help="move failed jobs back to pending")
+
+    collect_cmd = commands.add_parser('collect', help="merge finished extractions into the cell dataset")
+    collect_cmd.add_argument('--dataset', default=dataset_path)
+    collect_cmd.add_argument('--parts-dir', help=parts_help)
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue)
+
+    if args.command == 'enqueue':
+        added = enqueue_reports(queue, args.raw_dir)
+        print(f"✓ {added} new reports queued")
+        print_status(queue)
+    elif args.command == 'work':
+        queue.close()
+        options = dict(lease_seconds=args.lease, idle_exit=not args.forever, raw_dir=args.raw_dir,
+                       directory=args.parts_dir)
+        if args.workers == 1:
+            work(args.queue, **options)
+        else:
+            processes = [
+                multiprocessing.Process(target=work, args=(args.queue,), kwargs=options)
+                for _ in range(args.workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        queue = open_queue(args.queue)
+        print_status(queue)
+    elif args.command == 'status':
+        print_status(queue)
+    elif args.command == 'retry':
+        print(f"✓ {queue.retry_failed()} failed jobs back in the queue")
+    elif args.command == 'collect':
+        try:
+            rows = collect(queue, args.dataset, args.parts_dir or default_parts_dir(args.queue))
+        except FileNotFoundError as e:
+            queue.close()
+            raise SystemExit(f"✗ {e}")
+        print(f"✓ {rows:,} cells saved to: {args.dataset}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
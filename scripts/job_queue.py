@@ -0,0 +1,350 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+
+# Job states; running jobs hold a lease that other workers may take over once expired
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+STATES = (PENDING, RUNNING, DONE, FAILED)
+
+DEFAULT_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+queue_url = os.environ.get("INGEST_QUEUE", "sqlite:///data/queue/ingest.sqlite")
+
+
+def open_queue(url=None):
+    """Queue named by a URL: sqlite:///path for one machine, dir:///path for a shared directory
+
+    Anything offering enqueue/claim/heartbeat/complete/fail/counts can stand in
+    for these, e.g. a client for a hosted queue service.
+    """
+    url = url or queue_url
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):])
+    if url.startswith("dir:///"):
+        return DirectoryJobQueue(url[len("dir:///"):])
+    raise ValueError(f"Unsupported queue URL: {url}")
+
+
+class SQLiteJobQueue:
+    """Job queue in a local SQLite file; claims are serialized by BEGIN IMMEDIATE
+
+    Jobs are unique on (kind, key), so enqueueing work that is already queued or
+    finished is a no-op. Jobs are dicts with id, kind, key, payload and attempts.
+    """
+
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated REAL,
+                UNIQUE (kind, key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, lease_expires)")
+
+    def enqueue(self, kind, key, payload):
+        """Add a job unless one with this kind and key exists; returns True if added"""
+        cur = self.conn.execute(
+            "INSERT INTO jobs (kind, key, payload, updated) VALUES (?, ?, ?, ?) ON CONFLICT (kind, key) DO NOTHING",
+            (kind, key, json.dumps(payload), time.time())
+        )
+        return cur.rowcount == 1
+
+    def claim(self, owner, lease_seconds=DEFAULT_LEASE_SECONDS, kinds=None):
+        """Lease the oldest pending or abandoned job, or return None"""
+        now = time.time()
+        kind_filter = ''
+        params = [now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose workers kept dying are given up on rather than retried forever
+            self.conn.execute("""
+                UPDATE jobs SET state = 'failed', error = 'lease expired ' || attempts || ' times', updated = ?
+                WHERE state = 'running' AND lease_expires < ? AND attempts >= ?
+            """, (now, now, self.max_attempts))
+            row = self.conn.execute(f"""
+                SELECT job_id, kind, key, payload, attempts FROM jobs
+                WHERE (state = 'pending' OR (state = 'running' AND lease_expires < ?)){kind_filter}
+                ORDER BY job_id LIMIT 1
+            """, params).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute("""
+                UPDATE jobs SET state = 'running', lease_owner = ?, lease_expires = ?,
+                                attempts = attempts + 1, updated = ?
+                WHERE job_id = ?
+            """, (owner, now + lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        job_id, kind, key, payload, attempts = row
+        return {'id': job_id, 'kind': kind, 'key': key, 'payload': json.loads(payload),
+                'attempts': attempts + 1, 'owner': owner}
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend a job's lease; False if another worker has taken it over"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND lease_owner = ? AND state = 'running'",
+            (time.time() + lease_seconds, job['id'], job['owner'])
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job, result=None):
+        cur = self.conn.execute("""
+            UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_expires = NULL, updated = ?
+            WHERE job_id = ? AND lease_owner = ? AND state = 'running'
+        """, (json.dumps(result), time.time(), job['id'], job['owner']))
+        return cur.rowcount == 1
+
+    def fail(self, job, error):
+        """Record an error; the job goes back to pending until it runs out of attempts"""
+        state = FAILED if job['attempts'] >= self.max_attempts else PENDING
+        cur = self.conn.execute("""
+            UPDATE jobs SET state = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ?
+            WHERE job_id = ? AND lease_owner = ? AND state = 'running'
+        """, (state, str(error)[:2000], time.time(), job['id'], job['owner']))
+        return cur.rowcount == 1
+
+    def retry_failed(self):
+        cur = self.conn.execute("UPDATE jobs SET state = 'pending', attempts = 0 WHERE state = 'failed'")
+        return cur.rowcount
+
+    def results(self, kind):
+        """{key: result} of every finished job of one kind"""
+        rows = self.conn.execute("SELECT key, result FROM jobs WHERE kind = ? AND state = 'done'", (kind,))
+        return {key: json.loads(result) for key, result in rows}
+
+    def errors(self):
+        return self.conn.execute(
+            "SELECT kind, key, error FROM jobs WHERE state = 'failed' ORDER BY job_id"
+        ).fetchall()
+
+    def counts(self):
+        """{kind: {state: count}}"""
+        counts = {}
+        for kind, state, n in self.conn.execute("SELECT kind, state, COUNT(*) FROM jobs GROUP BY kind, state"):
+            counts.setdefault(kind, dict.fromkeys(STATES, 0))[state] = n
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+class DirectoryJobQueue:
+    """Job queue as JSON files in a directory shared between machines (e.g. over NFS)
+
+    A job lives in one of pending/, running/, done/ or failed/, and moves between
+    them with os.rename, which is atomic: of several workers renaming the same
+    pending file, exactly one succeeds and holds the job. A running file is
+    named for its owner and records its lease; workers move expired ones back
+    to pending/ without a lease.
+
+    Nothing rewrites a file another worker can see. The owner renames its
+    running file to a .hold name only it uses before changing the lease or
+    finishing, and a worker reclaiming an expired job first renames the file
+    to a name of its own. Whoever loses one of these renames has lost the job.
+    """
+
+    def __init__(self, root, max_attempts=MAX_ATTEMPTS):
+        self.root = root
+        self.max_attempts = max_attempts
+        for state in STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    @staticmethod
+    def _name(kind, key):
+        return f"{kind}--{re.sub(r'[^A-Za-z0-9._-]+', '_', key)}.json"
+
+    def _path(self, state, name):
+        return os.path.join(self.root, state, name)
+
+    @staticmethod
+    def _running_name(name, owner):
+        return f"{name[:-len('.json')]}@{re.sub(r'[^A-Za-z0-9._-]+', '_', owner)}.json"
+
+    @staticmethod
+    def _job_name(running_name):
+        """Job file name of a running, held or reclaimed file"""
+        return running_name.split('@', 1)[0] + '.json' if '@' in running_name else running_name
+
+    def _hold(self, job):
+        """(held path, running path) of a job its owner still holds, else None"""
+        running = self._path(RUNNING, self._running_name(job['id'], job['owner']))
+        held = running[:-len('.json')] + '.hold'
+        try:
+            os.rename(running, held)
+        except FileNotFoundError:
+            return None
+        return held, running
+
+    def _read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def _write(self, path, job):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def enqueue(self, kind, key, payload):
+        name = self._name(kind, key)
+        if any(os.path.exists(self._path(state, name)) for state in (PENDING, DONE, FAILED)):
+            return False
+        if any(self._job_name(running) == name for running in os.listdir(os.path.join(self.root, RUNNING))):
+            return False
+        job = {'kind': kind, 'key': key, 'payload': payload, 'attempts': 0}
+        tmp = os.path.join(self.root, f".{name}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, self._path(PENDING, name))
+        return True
+
+    def _reclaim_expired(self, now):
+        for name in os.listdir(os.path.join(self.root, RUNNING)):
+            path = self._path(RUNNING, name)
+            if name.endswith('.json'):
+                try:
+                    expired = self._read(path).get('lease_expires', 0) < now
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+            elif name.endswith('.hold') or re.search(r'\.reclaim-[^.]+$', name):
+                # Left behind by a worker that died in the middle of an update
+                try:
+                    expired = os.path.getmtime(path) < now - DEFAULT_LEASE_SECONDS
+                except FileNotFoundError:
+                    continue
+            else:
+                continue
+            if not expired:
+                continue
+
+            # Take the file before changing it; its owner may be renewing the lease
+            taken = f"{path.rsplit('.', 1)[0]}.reclaim-{uuid.uuid4().hex}"
+            try:
+                os.rename(path, taken)
+            except FileNotFoundError:
+                continue
+            job = self._read(taken)
+            if name.endswith('.json') and job.get('lease_expires', 0) >= now:
+                os.rename(taken, path)  # renewed just before it was taken
+                continue
+            job.pop('lease_expires', None)
+            job.pop('owner', None)
+            self._write(taken, job)
+            target = FAILED if job['attempts'] >= self.max_attempts else PENDING
+            os.rename(taken, self._path(target, self._job_name(name)))
+
+    def claim(self, owner, lease_seconds=DEFAULT_LEASE_SECONDS, kinds=None):
+        now = time.time()
+        self._reclaim_expired(now)
+        for name in sorted(os.listdir(os.path.join(self.root, PENDING))):
+            if not name.endswith('.json'):
+                continue
+            if kinds and name.split('--', 1)[0] not in kinds:
+                continue
+            running = self._path(RUNNING, self._running_name(name, owner))
+            held = running[:-len('.json')] + '.hold'
+            try:
+                os.rename(self._path(PENDING, name), held)
+                job = self._read(held)
+            except FileNotFoundError:
+                continue  # another worker got there first
+            job.update(attempts=job['attempts'] + 1, owner=owner, lease_expires=now + lease_seconds)
+            self._write(held, job)
+            os.rename(held, running)
+            return dict(job, id=name)
+        return None
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE_SECONDS):
+        paths = self._hold(job)
+        if paths is None:
+            return False
+        held, running = paths
+        current = self._read(held)
+        current['lease_expires'] = time.time() + lease_seconds
+        self._write(held, current)
+        os.rename(held, running)
+        return True
+
+    def _finish(self, job, state, **fields):
+        paths = self._hold(job)
+        if paths is None:
+            return False
+        held, _ = paths
+        current = self._read(held)
+        current.update(fields)
+        current.pop('lease_expires', None)
+        if state != DONE:
+            current.pop('owner', None)
+        self._write(held, current)
+        os.rename(held, self._path(state, job['id']))
+        return True
+
+    def complete(self, job, result=None):
+        return self._finish(job, DONE, result=result, error=None)
+
+    def fail(self, job, error):
+        state = FAILED if job['attempts'] >= self.max_attempts else PENDING
+        return self._finish(job, state, error=str(error)[:2000])
+
+    def retry_failed(self):
+        names = os.listdir(os.path.join(self.root, FAILED))
+        for name in names:
+            job = self._read(self._path(FAILED, name))
+            job['attempts'] = 0
+            self._write(self._path(FAILED, name), job)
+            os.rename(self._path(FAILED, name), self._path(PENDING, name))
+        return len(names)
+
+    def results(self, kind):
+        results = {}
+        for name in os.listdir(os.path.join(self.root, DONE)):
+            if name.split('--', 1)[0] == kind:
+                job = self._read(self._path(DONE, name))
+                results[job['key']] = job.get('result')
+        return results
+
+    def errors(self):
+        return [
+            (job['kind'], job['key'], job.get('error'))
+            for job in (self._read(self._path(FAILED, name))
+                        for name in sorted(os.listdir(os.path.join(self.root, FAILED))))
+        ]
+
+    def counts(self):
+        counts = {}
+        for state in STATES:
+            for name in os.listdir(os.path.join(self.root, state)):
+                # A job its owner is updating counts as running
+                if name.endswith('.json') or (state == RUNNING and name.endswith('.hold')):
+                    kind = name.split('--', 1)[0]
+                    counts.setdefault(kind, dict.fromkeys(STATES, 0))[state] += 1
+        return counts
+
+    def close(self):
+        pass
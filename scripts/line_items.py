@@ -0,0 +1,170 @@
+import re
+
+import pandas as pd
+
+from cell_parser import parse_numeric
+from tracing import span
+
+# Canonical metrics per statement, with the label phrases that identify them and
+# phrases that rule a label out. Earlier entries win when a label matches more than one.
+TAXONOMY = {
+    'income_statement': {
+        'Revenue from Contracts': {
+            'synonyms': ['revenue from contracts with customers'],
+        },
+        'Total Revenue': {
+            'synonyms': ['total revenue'],
+        },
+        'Direct Costs': {
+            'synonyms': ['direct costs'],
+        },
+        'EBITDA': {
+            # Spelled out, so "EBITDA margin" and similar rows are not taken for it
+            'synonyms': ['earnings before interest, taxes, depreciation',
+                         'earnings before interest, tax, depreciation'],
+        },
+        'Operating Profit': {
+            'synonyms': ['operating profit'],
+        },
+        'Profit Before Tax': {
+            'synonyms': ['profit before tax', 'profit before income tax'],
+        },
+        'Net Profit': {
+            'synonyms': ['profit for the year'],
+            'exclude': ['attributable'],
+        },
+    },
+    'balance_sheet': {
+        'Total Assets': {
+            'synonyms': ['total assets'],
+        },
+        'Total Liabilities': {
+            'synonyms': ['total liabilities'],
+            'exclude': ['equity'],
+        },
+        'Total Equity': {
+            'synonyms': ['total equity'],
+            'exclude': ['liabilities'],
+        },
+    },
+    'cash_flow': {
+        'Operating Cash Flow': {
+            'synonyms': ['net cash generated from operating', 'net cash from operating'],
+        },
+        'Investing Cash Flow': {
+            'synonyms': ['net cash used in investing', 'net cash from investing'],
+        },
+        'Financing Cash Flow': {
+            'synonyms': ['net cash used in financing', 'net cash from financing'],
+        },
+    },
+}
+
+
+def _group_name(statement, metric):
+    return re.sub(r'\W+', '_', f'{statement} {metric}'.lower()).strip('_')
+
+
+def compile_taxonomy(taxonomy=TAXONOMY):
+    """Compile every statement's metrics into one anchored alternation
+
+    Labels are matched as "<statement>|<label text>", so a single pattern with one
+    named group per (statement, metric) covers all statements at once.
+    """
+    alternatives = []
+    groups = {}
+    for statement, metrics in taxonomy.items():
+        for metric, spec in metrics.items():
+            name = _group_name(statement, metric)
+            groups[name] = metric
+            synonyms = '|'.join(re.escape(s) for s in spec['synonyms'])
+            excludes = '|'.join(re.escape(s) for s in spec.get('exclude', []))
+            guard = f'(?!.*(?:{excludes}))' if excludes else ''
+            alternatives.append(f'(?P<{name}>{re.escape(statement)}\\|{guard}.*?(?:{synonyms}))')
+    return re.compile('^(?:' + '|'.join(alternatives) + ')'), groups
+
+
+_compiled = {}
+
+
+def match_line_items(labels, statements, taxonomy=TAXONOMY):
+    """Map row labels to canonical metric names (NaN where nothing matches)
+
+    `statements` is a matching Series of statement keys, or one key for all rows.
+    """
+    key = id(taxonomy)
+    if key not in _compiled:
+        _compiled[key] = compile_taxonomy(taxonomy)
+    pattern, groups = _compiled[key]
+
+    normalized = labels.astype('string').str.lower().str.replace(r'\s+', ' ', regex=True)
+    if isinstance(statements, str):
+        keyed = statements + '|' + normalized
+    else:
+        keyed = statements.astype('string') + '|' + normalized
+
+    matches = keyed.str.extract(pattern)
+    # Exactly one group is set for a matching row; its column names the metric
+    hit = matches.notna()
+    metric = hit.idxmax(axis=1).map(groups)
+    return metric.where(hit.any(axis=1))
+
+
+def tag_rows(df, statement='income_statement', value_start=2, taxonomy=TAXONOMY):
+    """Metric and value of every row of one wide statement frame
+
+    Labels are the row's text cells joined together; the value is the number in
+    column `value_start` (GROUP current year; column 1 holds note references),
+    NaN when that cell is blank. Later year columns are never used in its place.
+    """
+    labels = df.astype('string').fillna('').agg(' '.join, axis=1)
+    if df.shape[1] > value_start:
+        values = parse_numeric(df.iloc[:, value_start])
+    else:
+        values = pd.Series(float('nan'), index=df.index)
+    return pd.DataFrame({
+        'metric': match_line_items(labels, statement, taxonomy),
+        'value': values,
+    }, index=df.index)
+
+
+def extract_metrics(df, statement='income_statement', value_start=2, taxonomy=TAXONOMY, keep='first'):
+    """{metric: value} for one wide statement frame
+
+    keep='first' takes the first matching row with a value; keep='last' takes
+    the last matching row, even without a value (None then).
+    """
+    tagged = tag_rows(df, statement, value_start, taxonomy).dropna(subset=['metric'])
+    if keep == 'first':
+        tagged = tagged.dropna(subset=['value'])
+    chosen = tagged.drop_duplicates('metric', keep=keep).set_index('metric')['value']
+    return {
+        metric: float(chosen[metric]) if metric in chosen and pd.notna(chosen[metric]) else None
+        for metric in taxonomy[statement]
+    }
+
+
+def tag_cells(cells, value_start=2, taxonomy=TAXONOMY):
+    """Tag every row of every statement in the long cell dataset in one pass
+
+    Returns one row per (report, year, statement, row) with the printed line item,
+    its note reference, the canonical metric (NaN when unmatched) and the value
+    in column `value_start` (NaN when that cell is blank). Cells from several
+    companies are kept apart by their company column.
+    """
+    keys = (['company'] if 'company' in cells.columns else []) + ['report', 'year', 'statement', 'row']
+    with span('tag_cells', 'parse', cells=len(cells)):
+        cells = cells.sort_values(keys + ['col'])
+
+        labels = cells.dropna(subset=['cell']).groupby(keys, observed=True)['cell'].agg(' '.join)
+
+        numeric = cells[cells['col'] == value_start]
+        values = numeric.assign(value=parse_numeric(numeric['cell'])).set_index(keys)['value']
+
+        line_items = cells[cells['col'] == 0].set_index(keys)['cell'].rename('line_item')
+        notes = cells[cells['col'] == 1].set_index(keys)['cell'].rename('note')
+
+        tagged = labels.to_frame('label').join([values, line_items, notes], how='left')
+        tagged = tagged.reset_index()
+        tagged['metric'] = match_line_items(tagged['label'], tagged['statement'], taxonomy)
+    return tagged
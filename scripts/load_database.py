@@ -0,0 +1,328 @@
+import argparse
+import io
+import time
+from datetime import date
+
+import pandas as pd
+
+from batch_extract import dataset_path
+from db import CHANGE_CHANNEL, apply_schema, deferrable_indexes, get_connection, is_sqlite_connection
+from line_items import tag_cells
+
+COMPANY = {
+    'name': 'Safaricom PLC',
+    'ticker': 'SCOM',
+    'sector': 'Telecommunications',
+    'country': 'Kenya',
+}
+# Companies whose details are known; other tickers are loaded under their ticker alone
+COMPANIES = {COMPANY['ticker']: COMPANY}
+# Financial year end per ticker. Safaricom's, 31 March, stands in for
+# companies whose year end is not recorded here yet.
+FISCAL_YEAR_END = (3, 31)
+FISCAL_YEAR_ENDS = {'SCOM': FISCAL_YEAR_END}
+REPORT_TYPE = 'Annual'
+
+STATEMENT_TABLES = {
+    'income_statement': 'income_statement',
+    'balance_sheet': 'balance_sheet',
+    'cash_flow': 'cash_flow',
+}
+# Tables that carry a category column next to the line item
+CATEGORY_TABLES = {'balance_sheet', 'cash_flow'}
+
+# Above this many line items the period indexes are dropped and rebuilt after the load
+DEFER_INDEX_THRESHOLD = 50000
+
+STAGE_COLUMNS = ['statement', 'fiscal_year', 'row_num', 'line_item', 'category', 'value', 'notes']
+
+
+def statement_lines(cells):
+    """Line items ready for staging: one row per printed statement row with a label
+
+    Cells without a company column (extract_financials output) are Safaricom's.
+    """
+    tagged = tag_cells(cells)
+    tagged = tagged[tagged['line_item'].notna() & (tagged['line_item'].str.strip() != '')]
+
+    lines = pd.DataFrame({
+        'company': tagged['company'].astype(str) if 'company' in tagged else COMPANY['ticker'],
+        'statement': tagged['statement'].astype(str),
+        'fiscal_year': tagged['year'].astype(int),
+        'row_num': tagged['row'].astype(int),
+        'line_item': tagged['line_item'].str.replace(r'\s+', ' ', regex=True).str.strip().str[:255],
+        'category': None,
+        'value': tagged['value'].round(2),
+        'notes': tagged['note'].str.strip().str[:50].replace('', None),
+    })
+    return lines.reset_index(drop=True)
+
+
+def copy_frame(cur, table, frame, columns):
+    """Stream a frame into a table with COPY FROM STDIN"""
+    buffer = io.StringIO()
+    frame[columns].to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer
+    )
+
+
+def upsert_company(cur, company):
+    cur.execute("""
+        INSERT INTO companies (name, ticker, sector, country)
+        VALUES (%(name)s, %(ticker)s, %(sector)s, %(country)s)
+        ON CONFLICT (ticker) DO UPDATE
+            SET name = EXCLUDED.name, sector = EXCLUDED.sector, country = EXCLUDED.country
+        RETURNING company_id
+    """, company)
+    return cur.fetchone()[0]
+
+
+def upsert_company_sqlite(cur, company):
+    cur.execute("""
+        INSERT INTO companies (name, ticker, sector, country)
+        VALUES (:name, :ticker, :sector, :country)
+        ON CONFLICT (ticker) DO UPDATE
+            SET name = excluded.name, sector = excluded.sector, country = excluded.country
+    """, company)
+    cur.execute("SELECT company_id FROM companies WHERE ticker = :ticker", company)
+    return cur.fetchone()[0]
+
+
+def company_details(ticker):
+    return COMPANIES.get(ticker, {'name': ticker, 'ticker': ticker, 'sector': None, 'country': None})
+
+
+def _period_end(year, year_end=FISCAL_YEAR_END):
+    return date(int(year), *year_end).isoformat()
+
+
+def load_batch(conn, company_id, lines, year_end=FISCAL_YEAR_END):
+    """Stage one batch of one company with COPY and upsert it into the real tables in a single transaction"""
+    years = sorted(lines['fiscal_year'].unique())
+    periods = pd.DataFrame({
+        'fiscal_year': years,
+        'period_end_date': [_period_end(y, year_end) for y in years],
+    })
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE stage_periods (
+                fiscal_year INTEGER, period_end_date DATE
+            ) ON COMMIT DROP
+        """)
+        copy_frame(cur, 'stage_periods', periods, ['fiscal_year', 'period_end_date'])
+        cur.execute("""
+            INSERT INTO financial_periods (company_id, fiscal_year, period_end_date, report_type)
+            SELECT %s, fiscal_year, period_end_date, %s FROM stage_periods
+            ON CONFLICT (company_id, fiscal_year, report_type) DO UPDATE
+                SET period_end_date = EXCLUDED.period_end_date
+        """, (company_id, REPORT_TYPE))
+
+        cur.execute("""
+            CREATE TEMP TABLE stage_lines (
+                statement TEXT, fiscal_year INTEGER, row_num INTEGER, line_item VARCHAR(255),
+                category VARCHAR(100), value NUMERIC(15, 2), notes VARCHAR(50)
+            ) ON COMMIT DROP
+        """)
+        copy_frame(cur, 'stage_lines', lines, STAGE_COLUMNS)
+
+        for statement, table in STATEMENT_TABLES.items():
+            category_column = ', category' if table in CATEGORY_TABLES else ''
+            category_value = ', s.category' if table in CATEGORY_TABLES else ''
+            category_update = ', category = EXCLUDED.category' if table in CATEGORY_TABLES else ''
+            # A label repeated within one statement keeps its first occurrence.
+            # Only inserted or changed rows are returned, and their periods are
+            # queued for the metrics materializer.
+            cur.execute(f"""
+                WITH changed AS (
+                    INSERT INTO {table} (period_id, line_item, value_kshs_millions, notes{category_column})
+                    SELECT DISTINCT ON (p.period_id, s.line_item)
+                        p.period_id, s.line_item, s.value, s.notes{category_value}
+                    FROM stage_lines s
+                    JOIN financial_periods p
+                      ON p.company_id = %s AND p.fiscal_year = s.fiscal_year AND p.report_type = %s
+                    WHERE s.statement = %s
+                    ORDER BY p.period_id, s.line_item, s.row_num
+                    ON CONFLICT (period_id, line_item) DO UPDATE
+                        SET value_kshs_millions = EXCLUDED.value_kshs_millions,
+                            notes = EXCLUDED.notes{category_update}
+                        WHERE ({table}.value_kshs_millions, {table}.notes)
+                              IS DISTINCT FROM (EXCLUDED.value_kshs_millions, EXCLUDED.notes)
+                    RETURNING period_id
+                )
+                INSERT INTO metric_refresh (period_id)
+                SELECT DISTINCT period_id FROM changed
+                ON CONFLICT (period_id) DO NOTHING
+            """, (company_id, REPORT_TYPE, statement))
+
+    conn.commit()
+
+
+def load_batch_sqlite(conn, company_id, lines, year_end=FISCAL_YEAR_END):
+    """Upsert one batch of one company into an embedded SQLite database
+
+    Lines are staged in a temporary table with batched prepared statements,
+    then upserted with one INSERT ... SELECT per statement table.
+    """
+    years = sorted(lines['fiscal_year'].unique())
+    # A label repeated within one statement keeps its first occurrence
+    lines = lines.sort_values('row_num').drop_duplicates(['statement', 'fiscal_year', 'line_item'])
+
+    with conn:
+        conn.executemany("""
+            INSERT INTO financial_periods (company_id, fiscal_year, period_end_date, report_type)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (company_id, fiscal_year, report_type) DO UPDATE
+                SET period_end_date = excluded.period_end_date
+        """, [(company_id, int(y), _period_end(y, year_end), REPORT_TYPE) for y in years])
+
+        period_ids = dict(conn.execute(
+            "SELECT fiscal_year, period_id FROM financial_periods WHERE company_id = ? AND report_type = ?",
+            (company_id, REPORT_TYPE)
+        ).fetchall())
+        lines = lines.assign(period_id=lines['fiscal_year'].map(period_ids))
+
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS stage_lines (
+                period_id INTEGER, line_item TEXT, value NUMERIC, notes TEXT, category TEXT
+            )
+        """)
+        for statement, table in STATEMENT_TABLES.items():
+            rows = lines.loc[lines['statement'] == statement,
+                             ['period_id', 'line_item', 'value', 'notes', 'category']].astype(object)
+            rows = rows.where(rows.notna(), None)
+            conn.execute("DELETE FROM stage_lines")
+            conn.executemany("INSERT INTO stage_lines VALUES (?, ?, ?, ?, ?)",
+                             rows.itertuples(index=False, name=None))
+
+            # Periods with a new or changed line are queued for the metrics materializer
+            conn.execute(f"""
+                INSERT INTO metric_refresh (period_id)
+                SELECT DISTINCT s.period_id
+                FROM stage_lines s
+                LEFT JOIN {table} t ON t.period_id = s.period_id AND t.line_item = s.line_item
+                WHERE t.id IS NULL
+                   OR t.value_kshs_millions IS NOT s.value
+                   OR t.notes IS NOT s.notes
+                ON CONFLICT (period_id) DO NOTHING
+            """)
+
+            category_column = ', category' if table in CATEGORY_TABLES else ''
+            category_value = ', category' if table in CATEGORY_TABLES else ''
+            category_update = ', category = excluded.category' if table in CATEGORY_TABLES else ''
+            # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+            conn.execute(f"""
+                INSERT INTO {table} (period_id, line_item, value_kshs_millions, notes{category_column})
+                SELECT period_id, line_item, value, notes{category_value} FROM stage_lines WHERE true
+                ON CONFLICT (period_id, line_item) DO UPDATE
+                    SET value_kshs_millions = excluded.value_kshs_millions,
+                        notes = excluded.notes{category_update}
+                    WHERE {table}.value_kshs_millions IS NOT excluded.value_kshs_millions
+                       OR {table}.notes IS NOT excluded.notes
+            """)
+
+
+def load(conn, lines, batch_years=50, defer_indexes=None):
+    """Load statement lines per company in batches of fiscal years, deferring indexes for large loads
+
+    Each ticker in the company column gets its own companies row and periods.
+    Returns {ticker: company_id}.
+    """
+    sqlite = is_sqlite_connection(conn)
+    if defer_indexes is None:
+        defer_indexes = len(lines) > DEFER_INDEX_THRESHOLD
+    indexes = deferrable_indexes()
+    upsert = upsert_company_sqlite if sqlite else upsert_company
+
+    cur = conn.cursor()
+    company_ids = {ticker: upsert(cur, company_details(ticker)) for ticker in sorted(lines['company'].unique())}
+    if defer_indexes:
+        for name in indexes:
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+    cur.close()
+    conn.commit()
+
+    try:
+        for ticker, company_lines in lines.groupby('company'):
+            company_id = company_ids[ticker]
+            year_end = FISCAL_YEAR_ENDS.get(ticker, FISCAL_YEAR_END)
+            years = sorted(company_lines['fiscal_year'].unique())
+            for start in range(0, len(years), batch_years):
+                batch = company_lines[company_lines['fiscal_year'].isin(years[start:start + batch_years])]
+                if sqlite:
+                    load_batch_sqlite(conn, company_id, batch, year_end)
+                else:
+                    load_batch(conn, company_id, batch, year_end)
+
+        # Readers listening on Postgres invalidate their caches; SQLite readers
+        # see the commit through PRAGMA data_version instead
+        if not sqlite:
+            cur = conn.cursor()
+            for company_id in company_ids.values():
+                cur.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, str(company_id)))
+            cur.close()
+            conn.commit()
+    finally:
+        if defer_indexes:
+            conn.rollback()
+            cur = conn.cursor()
+            for statement in indexes.values():
+                cur.execute(statement)
+            cur.close()
+            conn.commit()
+
+    return company_ids
+
+
+def summarize(conn):
+    """Line items per company, statement and fiscal year, read back from the database"""
+    cur = conn.cursor()
+    counts = []
+    for table in STATEMENT_TABLES.values():
+        cur.execute(f"""
+            SELECT c.ticker, p.fiscal_year, COUNT(*)
+            FROM {table} t
+            JOIN financial_periods p ON p.period_id = t.period_id
+            JOIN companies c ON c.company_id = p.company_id
+            GROUP BY c.ticker, p.fiscal_year ORDER BY c.ticker, p.fiscal_year
+        """)
+        counts.extend((ticker, table, year, count) for ticker, year, count in cur.fetchall())
+    cur.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load extracted statements into PostgreSQL or SQLite")
+    parser.add_argument('--dataset', default=dataset_path)
+    parser.add_argument('--batch-years', type=int, default=50,
+                        help="fiscal years upserted per transaction")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("LOADING FINANCIAL STATEMENTS INTO THE DATABASE")
+    print("="*70)
+
+    cells = pd.read_parquet(args.dataset)
+    lines = statement_lines(cells)
+
+    conn = get_connection()
+    try:
+        apply_schema(conn)
+        start = time.perf_counter()
+        load(conn, lines, batch_years=args.batch_years)
+        elapsed = time.perf_counter() - start
+        counts = summarize(conn)
+    finally:
+        conn.close()
+
+    for ticker, table, year, count in counts:
+        print(f"✓ {ticker} {table} FY {year}: {count} line items")
+    print(f"\n✓ Loaded {len(lines):,} line items in {elapsed:.2f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import MARGINS, RETURNS, Analytics, growth_column
+from db import apply_schema, get_connection, is_sqlite_connection
+from facts import FactTable
+from line_items import match_line_items
+from load_database import copy_frame
+
+# Statement tables the materialized metrics are computed from
+INPUT_TABLES = {
+    'income_statement': 'income_statement',
+    'balance_sheet': 'balance_sheet',
+}
+
+# Ratios of one period's own lines; every line item's growth is stored as well.
+# No metric reaches back further than the previous fiscal year, so a changed
+# period invalidates its own metrics and the next year's, nothing else.
+RATIO_METRICS = (['Gross Margin (%)'] + [f'{margin} (%)' for margin in MARGINS]
+                 + [f'{name} (%)' for name in RETURNS])
+GROWTH_SUFFIX = growth_column('')
+
+METRIC_COLUMNS = ['period_id', 'metric_name', 'metric_value']
+
+
+def is_materialized(metric):
+    return metric in RATIO_METRICS or metric.endswith(GROWTH_SUFFIX)
+
+
+def _temp_table(cur, sqlite, name, columns):
+    if sqlite:
+        cur.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        cur.execute(f"CREATE TEMP TABLE {name} ({columns})")
+    else:
+        cur.execute(f"CREATE TEMP TABLE {name} ({columns}) ON COMMIT DROP")
+
+
+def claim_changes(cur, sqlite, full=False):
+    """Take every queued period off the metric_refresh queue
+
+    Runs in the materializer's transaction, so a failed run leaves the queue
+    as it was, and a period the loader queues again meanwhile is kept for the
+    next run.
+    """
+    if full:
+        cur.execute("""
+            INSERT INTO metric_refresh (period_id)
+            SELECT period_id FROM financial_periods WHERE true
+            ON CONFLICT (period_id) DO NOTHING
+        """)
+    cur.execute("DELETE FROM metric_refresh RETURNING period_id")
+    return [row[0] for row in cur.fetchall()]
+
+
+def affected_periods(cur, sqlite, changed):
+    """Stage the changed periods and the next fiscal year of each, whose growth they feed
+
+    Returns (period_id, company_id, report_type, fiscal_year) of every affected period.
+    """
+    _temp_table(cur, sqlite, 'affected_periods', 'period_id INTEGER PRIMARY KEY')
+    placeholder = '?' if sqlite else '%s'
+    cur.executemany(f"INSERT INTO affected_periods (period_id) VALUES ({placeholder})",
+                    [(period_id,) for period_id in changed])
+    cur.execute("""
+        INSERT INTO affected_periods (period_id)
+        SELECT n.period_id
+        FROM affected_periods a
+        JOIN financial_periods p ON p.period_id = a.period_id
+        JOIN financial_periods n
+          ON n.company_id = p.company_id AND n.report_type = p.report_type
+         AND n.fiscal_year = p.fiscal_year + 1
+        WHERE true
+        ON CONFLICT (period_id) DO NOTHING
+    """)
+    cur.execute("""
+        SELECT p.period_id, p.company_id, p.report_type, p.fiscal_year
+        FROM affected_periods a JOIN financial_periods p ON p.period_id = a.period_id
+    """)
+    return pd.DataFrame(cur.fetchall(), columns=['period_id', 'company_id', 'report_type', 'fiscal_year'])
+
+
+def input_lines(cur):
+    """Statement lines of the affected periods and of the fiscal year before each"""
+    frames = []
+    for statement, table in INPUT_TABLES.items():
+        cur.execute(f"""
+            SELECT p.company_id, p.report_type, p.fiscal_year, s.line_item, s.value_kshs_millions
+            FROM {table} s
+            JOIN financial_periods p ON p.period_id = s.period_id
+            WHERE s.period_id IN (
+                SELECT q.period_id
+                FROM affected_periods a
+                JOIN financial_periods ap ON ap.period_id = a.period_id
+                JOIN financial_periods q
+                  ON q.company_id = ap.company_id AND q.report_type = ap.report_type
+                 AND q.fiscal_year IN (ap.fiscal_year, ap.fiscal_year - 1)
+            )
+            ORDER BY s.id
+        """)
+        frame = pd.DataFrame(cur.fetchall(),
+                             columns=['company_id', 'report_type', 'fiscal_year', 'line_item', 'value'])
+        frames.append(frame.assign(statement=statement))
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_metrics(lines, periods):
+    """Materialized metrics of `periods`, one row per (period_id, metric_name)
+
+    Lines are mapped onto the canonical line items and run through the same
+    Analytics formulas as the report and the dashboard. Each report type is
+    its own series of fiscal years.
+    """
+    if lines.empty or periods.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+
+    lines = lines.assign(
+        company=lines['company_id'].astype(str),
+        line_item=match_line_items(lines['line_item'], lines['statement']),
+        value=pd.to_numeric(lines['value'], errors='coerce').astype(float),
+    )
+    # A canonical line item matched by several printed rows keeps the first
+    lines = lines.dropna(subset=['line_item', 'value'])
+    lines = lines.drop_duplicates(['report_type', 'company', 'fiscal_year', 'statement', 'line_item'])
+
+    results = []
+    for report_type, group in lines.groupby('report_type'):
+        derived = Analytics(FactTable(group)).derived()
+        derived = derived.loc[:, [is_materialized(metric) for metric in derived.columns.get_level_values('metric')]]
+        values = derived.stack(['metric', 'company']).dropna()
+        values = values.rename('metric_value').reset_index()
+        results.append(values.assign(company_id=values['company'].astype(int), report_type=report_type))
+    if not results:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+
+    metrics = pd.concat(results, ignore_index=True).rename(columns={'metric': 'metric_name'})
+    metrics = metrics[np.isfinite(metrics['metric_value'])]
+    metrics = metrics.merge(periods, on=['company_id', 'report_type', 'fiscal_year'])
+    return metrics.assign(metric_value=metrics['metric_value'].round(4))[METRIC_COLUMNS]
+
+
+def write_metrics(cur, sqlite, metrics):
+    """Set-based upsert of the affected periods' metrics; returns (written, deleted)
+
+    Unchanged values are left alone, so calculation_date records when a
+    metric last changed. Metrics of an affected period that no longer have a
+    value are deleted.
+    """
+    _temp_table(cur, sqlite, 'stage_metrics',
+                'period_id INTEGER, metric_name VARCHAR(100), metric_value NUMERIC(15, 4)')
+    if sqlite:
+        cur.executemany("INSERT INTO stage_metrics VALUES (?, ?, ?)",
+                        metrics.astype(object).itertuples(index=False, name=None))
+        distinct = 'IS NOT'
+    else:
+        copy_frame(cur, 'stage_metrics', metrics, METRIC_COLUMNS)
+        distinct = 'IS DISTINCT FROM'
+
+    cur.execute(f"""
+        INSERT INTO financial_metrics (period_id, metric_name, metric_value, calculation_date)
+        SELECT period_id, metric_name, metric_value, CURRENT_TIMESTAMP FROM stage_metrics WHERE true
+        ON CONFLICT (period_id, metric_name) DO UPDATE
+            SET metric_value = EXCLUDED.metric_value, calculation_date = EXCLUDED.calculation_date
+            WHERE financial_metrics.metric_value {distinct} EXCLUDED.metric_value
+    """)
+    written = cur.rowcount
+    cur.execute("""
+        DELETE FROM financial_metrics
+        WHERE period_id IN (SELECT period_id FROM affected_periods)
+          AND NOT EXISTS (
+              SELECT 1 FROM stage_metrics s
+              WHERE s.period_id = financial_metrics.period_id
+                AND s.metric_name = financial_metrics.metric_name
+          )
+    """)
+    return written, cur.rowcount
+
+
+def materialize(conn, full=False):
+    """Recompute the metrics of periods whose lines changed since the last run
+
+    With `full`, every period is recomputed. Returns counts of the changed
+    periods, the affected periods and the metric rows written and deleted.
+    """
+    sqlite = is_sqlite_connection(conn)
+    cur = conn.cursor()
+    try:
+        if sqlite:
+            # Take the write lock up front so the loader cannot queue between claim and write
+            cur.execute("BEGIN IMMEDIATE")
+        changed = claim_changes(cur, sqlite, full)
+        if not changed:
+            conn.commit()
+            return {'changed': 0, 'affected': 0, 'written': 0, 'deleted': 0}
+
+        periods = affected_periods(cur, sqlite, changed)
+        metrics = compute_metrics(input_lines(cur), periods)
+        written, deleted = write_metrics(cur, sqlite, metrics)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return {'changed': len(changed), 'affected': len(periods), 'written': written, 'deleted': deleted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally materialize the financial_metrics table")
+    parser.add_argument('--full', action='store_true', help="recompute the metrics of every period")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("MATERIALIZING FINANCIAL METRICS")
+    print("="*70)
+
+    conn = get_connection()
+    try:
+        apply_schema(conn)
+        start = time.perf_counter()
+        counts = materialize(conn, full=args.full)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    if not counts['changed']:
+        print("✓ No periods changed since the last run")
+    else:
+        print(f"✓ {counts['changed']} changed periods, {counts['affected']} affected")
+        print(f"✓ {counts['written']} metrics written, {counts['deleted']} removed in {elapsed:.2f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import inspect
+from functools import cached_property
+
+import pdfplumber
+from pdfplumber.table import TableFinder, TableSettings
+from pdfplumber.utils import crop_to_bbox
+from pdfplumber.utils.text import WordExtractor, WordMap
+
+# Word grouping settings the analysis uses; table settings always spell out the tolerances
+WORD_SETTINGS = {name: param.default for name, param in inspect.signature(WordExtractor).parameters.items()}
+
+# pdfplumber releases the internals below were checked against
+TESTED_PDFPLUMBER = ("0.11.9", "0.11.10")
+
+
+def _check_pdfplumber():
+    """Fail on import if the pdfplumber internals this module relies on have changed
+
+    WordExtractor.extract_wordmap, WordMap.to_textmap(presorted=...),
+    crop_to_bbox and TableFinder's page.extract_words() call are not public
+    API; a release that drops them must not silently change text or tables.
+    """
+    problems = []
+    if not callable(getattr(WordExtractor, 'extract_wordmap', None)):
+        problems.append("WordExtractor.extract_wordmap is gone")
+    if 'presorted' not in inspect.signature(WordMap.to_textmap).parameters:
+        problems.append("WordMap.to_textmap no longer takes presorted")
+    if list(inspect.signature(crop_to_bbox).parameters) != ['objs', 'bbox']:
+        problems.append("crop_to_bbox no longer takes (objs, bbox)")
+    if list(inspect.signature(TableFinder).parameters)[:2] != ['page', 'settings']:
+        problems.append("TableFinder no longer takes (page, settings)")
+    try:
+        if 'self.page.extract_words(' not in inspect.getsource(TableFinder):
+            problems.append("TableFinder no longer gets its words from page.extract_words()")
+    except OSError:
+        problems.append("TableFinder's source is unavailable to check")
+    if problems:
+        raise ImportError(
+            f"page_analysis was checked against pdfplumber {', '.join(TESTED_PDFPLUMBER)} and does "
+            f"not work with {pdfplumber.__version__}: " + "; ".join(problems)
+        )
+
+
+_check_pdfplumber()
+
+
+class _SharedWords:
+    """The analysed page as pdfplumber's TableFinder sees it, with the analysis's words"""
+
+    def __init__(self, analysis):
+        self._analysis = analysis
+
+    def __getattr__(self, name):
+        return getattr(self._analysis.page, name)
+
+    def extract_words(self, **kwargs):
+        # Only non-default text settings group words differently and need their own pass
+        if any(name not in WORD_SETTINGS or WORD_SETTINGS[name] != value for name, value in kwargs.items()):
+            return self._analysis.page.extract_words(**kwargs)
+        return self._analysis.words
+
+
+class PageAnalysis:
+    """Layout of one page, worked out once and shared by text, tables and searches
+
+    pdfplumber groups a page's characters into words again for every
+    extract_text, search, extract_words and text-strategy table call, and
+    again for every crop. Here the characters and ruling edges are read once
+    and grouped into words once; the text, keyword hits and table edges all
+    derive from that one word map, and a crop reuses the page's words when
+    they exist. Everything is computed on first use, so a caller that only
+    needs one crop pays for that crop alone. Use it only while the page is
+    open (see page_stream).
+    """
+
+    def __init__(self, page, parent=None):
+        self.page = page
+        self.bbox = tuple(page.bbox)
+        self._parent = parent
+
+    @cached_property
+    def chars(self):
+        return self.page.chars
+
+    @cached_property
+    def lines(self):
+        return self.page.lines
+
+    @cached_property
+    def rects(self):
+        return self.page.rects
+
+    @cached_property
+    def edges(self):
+        return self.page.edges
+
+    @property
+    def horizontal_edges(self):
+        return [edge for edge in self.edges if edge['orientation'] == 'h']
+
+    @property
+    def vertical_edges(self):
+        return [edge for edge in self.edges if edge['orientation'] == 'v']
+
+    @cached_property
+    def _wordmap(self):
+        # The grouping both page.extract_words() and page.extract_text() do
+        return WordExtractor().extract_wordmap(self.chars)
+
+    @cached_property
+    def words(self):
+        parent = self._parent
+        if parent is not None and '_wordmap' in vars(parent):
+            return crop_to_bbox(parent.words, self.bbox)
+        return [word for word, _ in self._wordmap.tuples]
+
+    @cached_property
+    def textmap(self):
+        return self._wordmap.to_textmap(layout_bbox=self.bbox, layout_width=self.page.width,
+                                        layout_height=self.page.height, presorted=True)
+
+    @property
+    def text(self):
+        return self.textmap.as_string
+
+    def search(self, pattern, regex=True, case=True):
+        """Matches of `pattern` in the page text, each with its text and bbox"""
+        return self.textmap.search(pattern, regex=regex, case=case, return_chars=False)
+
+    def crop(self, bbox):
+        """Analysis of the part of the page inside `bbox`, sharing this one's words"""
+        return PageAnalysis(self.page.crop(bbox), parent=self)
+
+    def find_tables(self, settings=None):
+        return TableFinder(_SharedWords(self), TableSettings.resolve(settings)).tables
+
+    def tables(self, settings=None):
+        """Rows of every table on the page, as page.extract_tables() returns them"""
+        text_settings = TableSettings.resolve(settings).text_settings or {}
+        return [table.extract(**text_settings) for table in self.find_tables(settings)]
+
+    def table(self, settings=None):
+        """Rows of the largest table on the page, or None, as page.extract_table() returns them"""
+        tables = self.find_tables(settings)
+        if not tables:
+            return None
+        largest = min(tables, key=lambda table: (-len(table.cells), table.bbox[1], table.bbox[0]))
+        return largest.extract(**(TableSettings.resolve(settings).text_settings or {}))
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+
+from page_stream import PageStream, page_count as document_page_count
+from tracing import profiled
+
+cache_dir = "data/cache"
+cache_path = os.path.join(cache_dir, "page_text.sqlite")
+
+# Hashing a 250+ page report is not free, so remember it per (path, size, mtime)
+_hash_memo = {}
+
+
+def file_hash(pdf_path):
+    """SHA-256 of a PDF's contents, memoized while the file is unchanged"""
+    stat = os.stat(pdf_path)
+    memo_key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _hash_memo[memo_key] = digest.hexdigest()
+
+    return _hash_memo[memo_key]
+
+
+def settings_key(settings):
+    """Canonical string form of the extraction settings used as part of the cache key"""
+    return json.dumps(settings or {}, sort_keys=True)
+
+
+class PageTextCache:
+    """Content-addressed on-disk store of page text keyed on (PDF hash, page, settings)"""
+
+    def __init__(self, path=cache_path, max_rss_mb=None):
+        self.max_rss_mb = max_rss_mb
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                pdf_hash TEXT PRIMARY KEY,
+                page_count INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_text (
+                pdf_hash TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                settings TEXT NOT NULL,
+                text BLOB,
+                PRIMARY KEY (pdf_hash, page_num, settings)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def page_count(self, pdf_path):
+        """Number of pages in the PDF, opening it only the first time it is seen"""
+        pdf_hash = file_hash(pdf_path)
+        row = self.conn.execute(
+            "SELECT page_count FROM documents WHERE pdf_hash = ?", (pdf_hash,)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        count = document_page_count(pdf_path)
+        self._remember_page_count(pdf_hash, count)
+        return count
+
+    def get_texts(self, pdf_path, page_numbers=None, settings=None, extract=None):
+        """Return {page_num: text} for 0-indexed pages, running pdfplumber only for misses
+
+        `settings` are passed to page.extract_text() and form part of the key.
+        A custom `extract(page)` callable may be given for non-default extraction,
+        in which case `settings` must fully describe what it does.
+        """
+        pdf_hash = file_hash(pdf_path)
+        key = settings_key(settings)
+        if extract is None:
+            extract = lambda page: page.extract_text(**(settings or {}))
+
+        if page_numbers is None:
+            page_numbers = range(self.page_count(pdf_path))
+        page_numbers = list(page_numbers)
+
+        texts = {}
+        for page_num, blob in self.conn.execute(
+            "SELECT page_num, text FROM page_text WHERE pdf_hash = ? AND settings = ?",
+            (pdf_hash, key)
+        ):
+            texts[page_num] = None if blob is None else zlib.decompress(blob).decode('utf-8')
+
+        result = {n: texts[n] for n in page_numbers if n in texts}
+        missing = [n for n in page_numbers if n not in texts]
+        self.hits += len(result)
+        self.misses += len(missing)
+
+        if missing:
+            rows = []
+            # One page in memory at a time, however many pages are missing
+            pages = PageStream(pdf_path, missing, self.max_rss_mb)
+            for page_num, page in pages:
+                with profiled('extract_text', pdf=os.path.basename(pdf_path), page=page_num):
+                    text = extract(page)
+                result[page_num] = text
+                blob = None if text is None else zlib.compress(text.encode('utf-8'), 6)
+                rows.append((pdf_hash, page_num, key, blob))
+            self._remember_page_count(pdf_hash, pages.page_count)
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO page_text (pdf_hash, page_num, settings, text) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+        return {n: result[n] for n in page_numbers}
+
+    def stats(self):
+        """One-line summary of cache hits and misses since this cache was opened"""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"Page text cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+    def close(self):
+        self.conn.close()
+
+    def _remember_page_count(self, pdf_hash, count):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (pdf_hash, page_count) VALUES (?, ?)",
+            (pdf_hash, count)
+        )
+        self.conn.commit()
@@ -0,0 +1,146 @@
+import gc
+import os
+import warnings
+
+import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+from pdfplumber.page import Page
+
+from tracing import current_rss_kb
+
+# Resident memory above which the document is closed and reopened between pages
+MAX_RSS_MB = int(os.environ.get("PDF_MAX_RSS_MB", "1024"))
+
+
+def document_page_count(pdf):
+    """Page count from the page tree root, without building any pages"""
+    return int(resolve1(resolve1(pdf.doc.catalog['Pages'])['Count']))
+
+
+def page_count(pdf_path):
+    pdf = pdfplumber.open(pdf_path)
+    try:
+        return document_page_count(pdf)
+    finally:
+        close_document(pdf)
+
+
+def page_height(page_obj):
+    """Height of the pdfplumber Page a pdfminer page would become, without building it"""
+    x0, y0, x1, y1 = page_obj.mediabox
+    return abs(x1 - x0) if page_obj.rotate in (90, 270) else abs(y1 - y0)
+
+
+def close_document(pdf):
+    """Close a document without PDF.close(), which would build every Page first"""
+    pdf.flush_cache()
+    if not pdf.stream_is_external:
+        pdf.stream.close()
+
+
+def drop_object_caches(pdf):
+    """Empty pdfminer's caches of resolved objects
+
+    These are private to pdfminer's PDFDocument; where a version lacks them
+    nothing is cleared and the memory ceiling alone bounds the cache.
+    """
+    for name in ('_cached_objs', '_parsed_objs'):
+        cache = getattr(pdf.doc, name, None)
+        if isinstance(cache, dict):
+            cache.clear()
+
+
+class PageStream:
+    """Iterate (page_num, page) over a PDF one page at a time in bounded memory
+
+    pdfplumber's `pdf.pages` keeps every Page, and through it every decoded
+    content stream, alive until the document closes, and pdfminer caches every
+    object it resolves. Here only the wanted pages are built, straight from the
+    page tree, each is closed once the caller moves on, and the document's object caches are
+    dropped after every page. If resident memory still passes `max_rss_mb`,
+    the document is reopened before the next page. A ceiling that reopening
+    cannot get under is reported once and then ignored, rather than walking
+    the page tree again for every page.
+
+    Pages are 0-indexed and yielded in page order; a page must not be used
+    after the loop advances past it.
+    """
+
+    def __init__(self, pdf_path, page_numbers=None, max_rss_mb=None):
+        self.pdf_path = pdf_path
+        self.page_numbers = None if page_numbers is None else sorted(set(page_numbers))
+        self.max_rss_mb = MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.page_count = None
+        self.reopens = 0
+        self.peak_rss_kb = 0
+        self.ceiling_reachable = True
+
+    def _over_ceiling(self):
+        rss = current_rss_kb()
+        if rss is None or not self.max_rss_mb:
+            return False
+        if rss > self.max_rss_mb * 1024:
+            # Closed pages sit in reference cycles until the collector runs
+            gc.collect()
+            rss = current_rss_kb()
+        self.peak_rss_kb = max(self.peak_rss_kb, rss)
+        return rss > self.max_rss_mb * 1024
+
+    def __iter__(self):
+        pending = None if self.page_numbers is None else list(reversed(self.page_numbers))
+        next_page = 0
+
+        reopen = False
+        while pending is None or pending:
+            pdf = pdfplumber.open(self.pdf_path)
+            try:
+                # Nothing is cached in a freshly opened document; if memory is
+                # still over the ceiling, reopening cannot bring it under
+                if reopen and self._over_ceiling():
+                    warnings.warn(
+                        f"resident memory is still above {self.max_rss_mb} MB after reopening "
+                        f"{self.pdf_path}; reading on without reopening it",
+                        RuntimeWarning, stacklevel=2,
+                    )
+                    self.ceiling_reachable = False
+                reopen = False
+                if self.page_count is None:
+                    self.page_count = document_page_count(pdf)
+                doctop = 0
+                for index, page_obj in enumerate(PDFPage.create_pages(pdf.doc)):
+                    wanted = pending[-1] if pending is not None else next_page
+                    if index < wanted:
+                        doctop += page_height(page_obj)
+                        continue
+
+                    page = Page(pdf, page_obj, page_number=index + 1, initial_doctop=doctop)
+                    doctop += page.height
+                    yield index, page
+                    if pending is not None:
+                        pending.pop()
+                    next_page = index + 1
+
+                    page.close()
+                    del page
+                    drop_object_caches(pdf)
+
+                    if pending is not None and not pending:
+                        break
+                    if self.ceiling_reachable and self._over_ceiling():
+                        self.reopens += 1
+                        reopen = True
+                        break
+            finally:
+                close_document(pdf)
+
+            if not reopen:
+                break
+
+        if pending:
+            raise IndexError(f"page {pending[-1]} is out of range for {self.pdf_path}")
+
+
+def iter_pages(pdf_path, page_numbers=None, max_rss_mb=None):
+    """Yield (0-indexed page number, page) one page at a time; see PageStream"""
+    return iter(PageStream(pdf_path, page_numbers, max_rss_mb))
@@ -0,0 +1,310 @@
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import tracing
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(scripts_dir)
+state_path = "data/cache/pipeline_state.json"
+
+# Each stage is one script run from the repository root. Inputs and outputs are
+# paths or globs relative to the root; a stage depends on every stage that
+# declares one of its inputs as an output. The script and the local modules it
+# imports are inputs of every stage automatically. Processed tables are
+# partitioned datasets (see processed_store.py), declared by their part files.
+STAGES = {
+    'extract_financials': {
+        'script': 'scripts/extract_financials.py',
+        'inputs': ['data/raw/*.pdf', 'data/manifest/table_settings.json'],
+        'outputs': ['data/manifest/statement_pages.json', 'data/extracted/statements.parquet'],
+    },
+    'parse_financials': {
+        'script': 'scripts/parse_financials.py',
+        'inputs': ['data/extracted/statements.parquet'],
+        'outputs': ['data/processed/store/summary/*/*/*.parquet'],
+    },
+    'transform_clean': {
+        'script': 'scripts/transform_clean.py',
+        'inputs': ['data/extracted/statements.parquet'],
+        'outputs': ['data/processed/store/income/*/*/*.parquet'],
+    },
+    'extract_from_text': {
+        'script': 'scripts/extract_from_text.py',
+        'inputs': ['data/raw/*.pdf', 'data/processed/store/summary/*/*/*.parquet'],
+        'outputs': ['data/processed/store/analysis/*/*/*.parquet'],
+    },
+    'create_report': {
+        'script': 'scripts/create_report.py',
+        'inputs': ['data/processed/store/analysis/*/*/*.parquet', 'data/processed/store/income/*/*/*.parquet',
+                   'templates/financial_report.txt'],
+        'outputs': ['data/processed/SAFARICOM_FINANCIAL_REPORT.txt'],
+    },
+    'create_visualizations': {
+        'script': 'scripts/create_visualizations.py',
+        'inputs': ['data/processed/store/analysis/*/*/*.parquet', 'data/processed/store/income/*/*/*.parquet'],
+        'outputs': ['visualizations/*.png'],
+    },
+}
+
+
+def local_imports(script, seen=None):
+    """Paths of the scripts/ modules a script imports, followed transitively"""
+    seen = set() if seen is None else seen
+    with open(os.path.join(root_dir, script)) as f:
+        tree = ast.parse(f.read(), script)
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+
+    for name in sorted(names):
+        path = os.path.join('scripts', f'{name}.py')
+        if path not in seen and os.path.exists(os.path.join(root_dir, path)):
+            seen.add(path)
+            local_imports(path, seen)
+    return seen
+
+
+def stage_inputs(stage):
+    """Every file a stage reads: declared inputs plus its script and local modules"""
+    paths = {stage['script']} | local_imports(stage['script'])
+    for pattern in stage['inputs']:
+        paths.update(os.path.relpath(p, root_dir) for p in glob.glob(os.path.join(root_dir, pattern)))
+    return sorted(paths)
+
+
+def dependencies(stages=STAGES):
+    """{stage: set of stages producing one of its inputs}"""
+    producers = {}
+    for name, stage in stages.items():
+        for output in stage['outputs']:
+            producers[output] = name
+    return {
+        name: {producers[i] for i in stage['inputs'] if i in producers and producers[i] != name}
+        for name, stage in stages.items()
+    }
+
+
+def topological_order(deps):
+    order = []
+    done = set()
+    while len(order) < len(deps):
+        ready = sorted(name for name in deps if name not in done and deps[name] <= done)
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among: {sorted(set(deps) - done)}")
+        order.extend(ready)
+        done.update(ready)
+    return order
+
+
+class PipelineState:
+    """Input hash of each stage's last successful run, and a file hash memo
+
+    File hashes are reused while a file's size and mtime are unchanged, so
+    unchanged PDFs are not re-read on every run.
+    """
+
+    def __init__(self, path=state_path):
+        self.path = os.path.join(root_dir, path)
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        self.stages = data.get('stages', {})
+        self.files = data.get('files', {})
+
+    def file_hash(self, path):
+        stat = os.stat(os.path.join(root_dir, path))
+        cached = self.files.get(path)
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(os.path.join(root_dir, path), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def inputs_hash(self, stage):
+        digest = hashlib.sha256()
+        for path in stage_inputs(stage):
+            digest.update(f'{path}\0{self.file_hash(path)}\0'.encode())
+        return digest.hexdigest()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'stages': self.stages, 'files': self.files}, f, indent=2, sort_keys=True)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def outputs_exist(stage):
+    return all(glob.glob(os.path.join(root_dir, pattern)) for pattern in stage['outputs'])
+
+
+def run_stage(name, stage):
+    """Run one stage's script from the repository root; returns (name, returncode, output, seconds)
+
+    The child is reaped with wait4 so its own CPU time and peak RSS can be
+    recorded as the stage's trace event.
+    """
+    start_us = time.time_ns() // 1000
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, stage['script']],
+        cwd=root_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    output = proc.stdout.read()
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+
+    tracing.record(
+        name, 'stage', start_us,
+        wall_us=int(seconds * 1e6),
+        cpu_us=int((usage.ru_utime + usage.ru_stime) * 1e6),
+        peak_kb=usage.ru_maxrss,
+        pid=proc.pid, tid=0, returncode=proc.returncode
+    )
+    return name, proc.returncode, output, seconds
+
+
+def run_pipeline(stages=STAGES, targets=None, workers=None, force=False, dry_run=False, state_file=state_path):
+    """Run stages in dependency order, in parallel where independent
+
+    A stage is skipped when the hash of its inputs matches its last successful
+    run and its outputs exist. Hashes are taken once the stage's dependencies
+    have finished, so a rerun upstream that changes an output reruns its
+    consumers too. Returns {stage: 'ran' | 'skipped' | 'failed' | 'blocked' | 'pending'}.
+    """
+    deps = dependencies(stages)
+    order = topological_order(deps)
+    if targets:
+        wanted = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(deps[name])
+        order = [name for name in order if name in wanted]
+
+    state = PipelineState(state_file)
+    status = {}
+    hashes = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while len(status) < len(order):
+            for name in order:
+                if name in status or name in running:
+                    continue
+                upstream = [status.get(d) for d in deps[name] if d in order]
+                if any(s in ('failed', 'blocked') for s in upstream):
+                    status[name] = 'blocked'
+                    print(f"✗ {name}: blocked by a failed dependency")
+                    continue
+                if any(s not in ('ran', 'skipped', 'pending') for s in upstream):
+                    continue
+
+                stage = stages[name]
+                if dry_run:
+                    # Upstream stages that would run make every consumer stale
+                    stale = (force or 'pending' in upstream or not outputs_exist(stage)
+                             or state.stages.get(name) != state.inputs_hash(stage))
+                    status[name] = 'pending' if stale else 'skipped'
+                    print(f"{'→' if stale else '-'} {name}: {'would run' if stale else 'unchanged'}")
+                    continue
+
+                hashes[name] = state.inputs_hash(stage)
+                if not force and state.stages.get(name) == hashes[name] and outputs_exist(stage):
+                    status[name] = 'skipped'
+                    print(f"- {name}: unchanged, skipped")
+                    continue
+                print(f"→ {name}: running")
+                running[name] = pool.submit(run_stage, name, stage)
+
+            if not running:
+                continue
+            done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, returncode, output, seconds = future.result()
+                del running[name]
+                if returncode == 0:
+                    status[name] = 'ran'
+                    state.stages[name] = hashes[name]
+                    state.save()
+                    print(f"✓ {name}: finished in {seconds:.2f}s")
+                else:
+                    status[name] = 'failed'
+                    print(f"✗ {name}: exit code {returncode} after {seconds:.2f}s")
+                    print(output.rstrip())
+
+    state.save()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages that are out of date")
+    parser.add_argument('targets', nargs='*', metavar='stage',
+                        help=f"stages to bring up to date, with their dependencies: {', '.join(STAGES)} (default: all)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="stages run at once (default: one per CPU core)")
+    parser.add_argument('--force', action='store_true', help="rerun stages even if unchanged")
+    parser.add_argument('--dry-run', action='store_true', help="only report which stages are out of date")
+    parser.add_argument('--trace', metavar='DIR', default=None,
+                        help="record stage, page and render timings into DIR and export them")
+    parser.add_argument('--profile', action='store_true',
+                        help="with --trace, also cProfile every extract_text/extract_tables call")
+    args = parser.parse_args()
+    unknown = [name for name in args.targets if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    if args.trace:
+        # Inherited by every stage process and their worker pools
+        os.environ[tracing.TRACE_ENV] = os.path.abspath(args.trace)
+        if args.profile:
+            os.environ[tracing.PROFILE_ENV] = '1'
+
+    print("="*70)
+    print("RUNNING PIPELINE")
+    print("="*70)
+
+    start = time.perf_counter()
+    status = run_pipeline(targets=args.targets, workers=args.workers, force=args.force, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for outcome in status.values():
+        counts[outcome] = counts.get(outcome, 0) + 1
+    print("\n" + "="*70)
+    print(f"✓ {', '.join(f'{n} {outcome}' for outcome, n in sorted(counts.items()))} in {elapsed:.2f}s")
+    print("="*70)
+
+    if args.trace and os.path.isdir(os.environ[tracing.TRACE_ENV]):
+        events, json_path, chrome_path = tracing.export(os.environ[tracing.TRACE_ENV])
+        print()
+        tracing.print_summary(events)
+        print(f"\n✓ Trace written to {json_path} and {chrome_path}")
+
+    if any(outcome in ('failed', 'blocked') for outcome in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+processed_dir = "data/processed"
+store_dir = os.path.join(processed_dir, "store")
+
+DEFAULT_COMPANY = "SCOM"
+
+# Processed tables and the CSV each one replaces
+TABLES = {
+    "summary": os.path.join(processed_dir, "safaricom_financial_summary.csv"),
+    "income": os.path.join(processed_dir, "income_statement_summary.csv"),
+    "analysis": os.path.join(processed_dir, "safaricom_3year_analysis.csv"),
+}
+
+# Tables hold long facts (company, fiscal_year, statement, line_item, value),
+# so a new line item adds rows rather than a column; see facts.FactTable.
+# Every table is partitioned into <table>/company=<ticker>/fiscal_year=<year>/,
+# so a reader only opens the companies and years it asks for.
+PARTITION_COLUMNS = ["company", "fiscal_year"]
+FACT_COLUMNS = ["statement", "line_item", "value"]
+PARTITIONING = ds.partitioning(
+    pa.schema([("company", pa.string()), ("fiscal_year", pa.int16())]),
+    flavor="hive",
+)
+
+
+def table_path(table, root=store_dir):
+    if table not in TABLES:
+        raise ValueError(f"Unknown processed table: {table} (expected one of {', '.join(TABLES)})")
+    return os.path.join(root, table)
+
+
+def write_table(facts, table, root=store_dir):
+    """Write a long fact frame, replacing only the (company, year) partitions it covers"""
+    path = table_path(table, root)
+    frame = facts[PARTITION_COLUMNS + FACT_COLUMNS].astype({
+        "company": "string",
+        "fiscal_year": "int16",
+        "statement": "category",
+        "line_item": "category",
+        "value": "float64",
+    })
+
+    data = pa.Table.from_pandas(frame, preserve_index=False)
+    ds.write_dataset(
+        data, path,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        # pyarrow refuses more than 1024 partitions per write by default
+        max_partitions=max(1024, frame.groupby(PARTITION_COLUMNS).ngroups),
+    )
+    return path
+
+
+def _dataset(table, root=store_dir):
+    path = table_path(table, root)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No processed data for '{table}' in {root}; run the pipeline first")
+    return ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+
+def read_table(table, companies=None, years=None, line_items=None, columns=None, root=store_dir):
+    """Long facts of selected companies, years and line items
+
+    Partitions outside `companies`/`years` are never opened; the line item
+    filter is applied while scanning, so unwanted rows are never materialized.
+    """
+    condition = None
+    for column, wanted in (("company", companies), ("fiscal_year", years), ("line_item", line_items)):
+        if wanted is None:
+            continue
+        if column == "fiscal_year":
+            wanted = [int(y) for y in wanted]
+        clause = ds.field(column).isin(list(wanted))
+        condition = clause if condition is None else condition & clause
+
+    columns = columns or PARTITION_COLUMNS + FACT_COLUMNS
+    return _dataset(table, root).to_table(columns=columns, filter=condition).to_pandas()
+
+
+def table_version(table, root=store_dir):
+    """(path, mtime, size) of every part file of a table
+
+    Changes whenever a part is written, removed or replaced, whether by
+    write_table, a checkout or a pull.
+    """
+    parts = []
+    for dirpath, _, files in os.walk(table_path(table, root)):
+        for name in files:
+            if name.endswith(".parquet"):
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                parts.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(parts))
+
+
+def import_csv(table, csv_path=None, company=DEFAULT_COMPANY, root=store_dir):
+    """Load one of the old wide processed CSVs into the store"""
+    from facts import FactTable
+
+    facts = FactTable.from_wide(pd.read_csv(csv_path or TABLES[table]), company=company)
+    return write_table(facts.to_frame(), table, root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned Parquet store of the processed tables")
+    parser.add_argument('--import-csv', action='store_true',
+                        help="load the processed CSVs into the store")
+    parser.add_argument('--company', default=DEFAULT_COMPANY, help="ticker the imported CSVs belong to")
+    parser.add_argument('--root', default=store_dir)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("PROCESSED DATA STORE")
+    print("="*70)
+
+    for table, csv_path in TABLES.items():
+        if args.import_csv:
+            if not os.path.exists(csv_path):
+                print(f"✗ {table}: {csv_path} not found")
+                continue
+            import_csv(table, csv_path, args.company, args.root)
+            print(f"✓ {table}: imported {csv_path}")
+        try:
+            frame = read_table(table, columns=['company', 'fiscal_year', 'line_item'], root=args.root)
+        except FileNotFoundError:
+            print(f"- {table}: empty")
+            continue
+        print(f"  {table}: {len(frame)} facts, {frame['company'].nunique()} companies, "
+              f"FY {frame['fiscal_year'].min()}-{frame['fiscal_year'].max()}, "
+              f"{frame['line_item'].nunique()} line items")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+
+import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import PSLiteral
+
+from page_analysis import PageAnalysis
+from page_cache import PageTextCache, cache_path as default_cache_path, file_hash
+from page_stream import close_document, document_page_count, iter_pages
+from statement_scan import header_band_texts
+
+raw_data_dir = "data/raw"
+manifest_path = "data/manifest/statement_pages.json"
+
+# Title phrases identifying each primary statement, in outline entries or page headers
+STATEMENT_TITLES = {
+    'income_statement': [
+        'statement of comprehensive income',
+        'statement of profit or loss',
+        'income statement',
+    ],
+    'balance_sheet': [
+        'statement of financial position',
+        'balance sheet',
+    ],
+    'cash_flow': [
+        'statement of cash flows',
+        'cash flow statement',
+    ],
+}
+
+HEADER_BAND = 0.25
+SCAN_CHUNK = 10
+
+
+def match_statement(text):
+    """Return the statement key whose title appears in `text`, or None"""
+    if not text:
+        return None
+    text_lower = ' '.join(text.lower().split())
+    for statement, titles in STATEMENT_TITLES.items():
+        if any(title in text_lower for title in titles):
+            return statement
+    return None
+
+
+def report_year(pdf_file):
+    """Fiscal year taken from the report's file name"""
+    match = re.search(r'(20\d{2})', pdf_file)
+    return match.group(1) if match else None
+
+
+def _dest_page_index(pdf, dest, page_index):
+    """0-indexed page an outline destination points at, or None"""
+    dest = resolve1(dest)
+    if isinstance(dest, (str, bytes, PSLiteral)):
+        name = dest.name if isinstance(dest, PSLiteral) else dest
+        dest = resolve1(pdf.doc.get_dest(name))
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get('D'))
+    if isinstance(dest, list) and dest:
+        target = dest[0]
+        objid = getattr(target, 'objid', None)
+        if objid is not None:
+            return page_index.get(objid)
+        if isinstance(target, int):
+            return target
+    return None
+
+
+def outline_pages(pdf):
+    """Statement pages named in the PDF's bookmarks, if it has any"""
+    try:
+        outlines = list(pdf.doc.get_outlines())
+    except Exception:
+        return {}
+
+    # Page object ids straight from the page tree; pdf.pages would build every Page
+    page_index = {page.pageid: i for i, page in enumerate(PDFPage.create_pages(pdf.doc))}
+    found = {}
+    for level, title, dest, action, se in outlines:
+        statement = match_statement(title)
+        if statement is None or statement in found:
+            continue
+        if dest is None and action is not None:
+            action = resolve1(action)
+            dest = action.get('D') if isinstance(action, dict) else None
+        try:
+            page_num = _dest_page_index(pdf, dest, page_index)
+        except Exception:
+            page_num = None
+        if page_num is not None:
+            found[statement] = page_num
+    return found
+
+
+def scan_back_half(cache, pdf_path, page_count, found):
+    """Scan the back half of a report for statements not yet found, stopping when all are"""
+    for start in range(page_count // 2, page_count, SCAN_CHUNK):
+        if len(found) == len(STATEMENT_TITLES):
+            break
+        page_texts = header_band_texts(
+            cache, pdf_path, range(start, min(start + SCAN_CHUNK, page_count)), HEADER_BAND
+        )
+        for page_num, text in page_texts.items():
+            statement = match_statement(text)
+            if statement and statement not in found:
+                found[statement] = page_num
+    return found
+
+
+def statement_regions(pdf_path, found):
+    """Table bbox and layout of each found statement, reading each statement page once"""
+    from table_region import locate_region
+
+    by_page = {}
+    for statement, page_num in found.items():
+        by_page.setdefault(page_num, []).append(statement)
+    regions = {}
+    for page_num, page in iter_pages(pdf_path, by_page):
+        # Statements sharing a page share its layout pass
+        analysis = PageAnalysis(page)
+        for statement in by_page[page_num]:
+            regions[statement] = locate_region(analysis, statement)
+    return regions
+
+
+def locate_statements(pdf_path, cache):
+    """Find the 0-indexed income statement, balance sheet and cash flow pages of one report"""
+    pdf = pdfplumber.open(pdf_path)
+    try:
+        page_count = document_page_count(pdf)
+        found = outline_pages(pdf)
+    finally:
+        close_document(pdf)
+    sources = {statement: 'outline' for statement in found}
+
+    scan_back_half(cache, pdf_path, page_count, found)
+    for statement in found:
+        sources.setdefault(statement, 'scan')
+
+    entry = {'page_count': page_count, 'source': sources, 'regions': statement_regions(pdf_path, found)}
+    for statement in STATEMENT_TITLES:
+        entry[statement] = found.get(statement)
+    return entry
+
+
+def load_manifest(path=manifest_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_manifest(raw_dir=raw_data_dir, path=manifest_path, cache_path=default_cache_path):
+    """Map every PDF in `raw_dir` to its statement pages, relocating only reports whose hash changed"""
+    manifest = load_manifest(path)
+    pdf_files = sorted([f for f in os.listdir(raw_dir) if f.endswith('.pdf')])
+
+    cache = None
+    updated = {}
+    for pdf_file in pdf_files:
+        pdf_path = os.path.join(raw_dir, pdf_file)
+        sha256 = file_hash(pdf_path)
+
+        entry = manifest.get(pdf_file)
+        if entry is None or entry.get('sha256') != sha256:
+            if cache is None:
+                cache = PageTextCache(cache_path)
+            entry = locate_statements(pdf_path, cache)
+            entry['sha256'] = sha256
+            entry['year'] = report_year(pdf_file)
+            print(f"✓ Located statements in {pdf_file}")
+        updated[pdf_file] = entry
+
+    if cache is not None:
+        cache.close()
+
+    if updated != manifest:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(updated, f, indent=2, sort_keys=True)
+
+    return updated
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("LOCATING FINANCIAL STATEMENTS")
+    print("="*70)
+
+    manifest = build_manifest()
+    for pdf_file, entry in manifest.items():
+        print(f"\n{pdf_file} (FY {entry['year']}, {entry['page_count']} pages)")
+        for statement in STATEMENT_TITLES:
+            page_num = entry[statement]
+            region = entry.get('regions', {}).get(statement)
+            layout = f", {region['layout']} table" if region else ""
+            where = f"page {page_num + 1} ({entry['source'][statement]}{layout})" if page_num is not None else "not found"
+            print(f"  - {statement}: {where}")
+
+    print(f"\n✓ Manifest saved to: {manifest_path}")
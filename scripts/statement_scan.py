@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from page_cache import PageTextCache, cache_path as default_cache_path
+
+# Title keywords for each primary statement, checked in this order
+STATEMENT_KEYWORDS = [
+    ('consolidated statement of comprehensive income', 'Income Statement'),
+    ('consolidated statement of financial position', 'Balance Sheet'),
+    ('consolidated statement of cash flows', 'Cash Flow Statement'),
+]
+
+NOTES_KEYWORD = 'notes to the financial statements'
+
+# Header-band text containing these, but no full title, needs a full-page look
+# (titles that wrap, or sit just below the band on unusually laid out pages)
+AMBIGUOUS_HINTS = [
+    'consolidated statement',
+    'statement of comprehensive',
+    'statement of financial',
+    'statement of cash',
+]
+
+
+def classify_text(text):
+    """Return the statement type a page's text belongs to, or None"""
+    if not text:
+        return None
+    text_lower = text.lower()
+    for keyword, statement_type in STATEMENT_KEYWORDS:
+        if keyword in text_lower:
+            return statement_type
+    return None
+
+
+def shard_ranges(page_count, shard_size):
+    """Split [0, page_count) into consecutive (start, end) page ranges"""
+    return [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+
+
+def is_ambiguous(band_text):
+    """True when a header band can neither confirm nor rule out a statement title"""
+    if not band_text:
+        return True
+    band_lower = band_text.lower()
+    return any(hint in band_lower for hint in AMBIGUOUS_HINTS)
+
+
+def header_band_text(page, header_band):
+    """Text of the top `header_band` fraction of a page"""
+    x0, top, x1, bottom = page.bbox
+    band = page.crop((x0, top, x1, top + (bottom - top) * header_band))
+    return band.extract_text()
+
+
+def header_band_texts(cache, pdf_path, page_numbers, header_band):
+    """Header-band text for each page, with full-page text only where the band is ambiguous"""
+    page_texts = cache.get_texts(
+        pdf_path, page_numbers,
+        settings={'header_band': header_band},
+        extract=lambda page: header_band_text(page, header_band)
+    )
+    ambiguous = [
+        page_num for page_num, text in page_texts.items()
+        if classify_text(text) is None and is_ambiguous(text)
+    ]
+    if ambiguous:
+        page_texts.update(cache.get_texts(pdf_path, ambiguous))
+    return page_texts
+
+
+def scan_shard(pdf_path, start, end, header_band=None, cache_path=default_cache_path, max_rss_mb=None):
+    """Scan pages [start, end) of one PDF with this process's own cache and pdfplumber handle
+
+    With `header_band` set (a fraction of page height), only the top of each page is
+    extracted and the full page is read only for ambiguous pages. Pages are
+    streamed, keeping this process under `max_rss_mb` (see page_stream).
+    """
+    cache = PageTextCache(cache_path, max_rss_mb)
+    if header_band:
+        page_texts = header_band_texts(cache, pdf_path, range(start, end), header_band)
+    else:
+        page_texts = cache.get_texts(pdf_path, range(start, end))
+
+    found = []
+    notes_page = None
+    for page_num, text in page_texts.items():
+        statement_type = classify_text(text)
+        if statement_type:
+            found.append((page_num + 1, statement_type))
+        elif notes_page is None and text and NOTES_KEYWORD in text.lower():
+            notes_page = page_num + 1
+
+    result = {
+        'pdf_path': pdf_path,
+        'start': start,
+        'found': found,
+        'notes_page': notes_page,
+        'hits': cache.hits,
+        'misses': cache.misses,
+    }
+    cache.close()
+    return result
+
+
+def scan_reports(pdf_paths, workers=1, shard_size=25, header_band=None, cache_path=default_cache_path,
+                 max_rss_mb=None):
+    """Find statement pages in every PDF, sharding page ranges across a process pool
+
+    Returns {pdf_path: {'page_count', 'found', 'notes_page'}} with `found` in page order,
+    plus the combined cache hit/miss counts.
+    """
+    cache = PageTextCache(cache_path)
+    page_counts = {pdf_path: cache.page_count(pdf_path) for pdf_path in pdf_paths}
+    cache.close()
+
+    tasks = [
+        (pdf_path, start, end, header_band, cache_path, max_rss_mb)
+        for pdf_path in pdf_paths
+        for start, end in shard_ranges(page_counts[pdf_path], shard_size)
+    ]
+
+    if workers == 1:
+        shard_results = [scan_shard(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            shard_results = list(pool.map(scan_shard, *zip(*tasks))) if tasks else []
+
+    # Merge shards back into one ordered result per report
+    results = {
+        pdf_path: {'page_count': page_counts[pdf_path], 'found': [], 'notes_page': None}
+        for pdf_path in pdf_paths
+    }
+    stats = {'hits': 0, 'misses': 0}
+    for shard in sorted(shard_results, key=lambda s: (s['pdf_path'], s['start'])):
+        report = results[shard['pdf_path']]
+        report['found'].extend(shard['found'])
+        if report['notes_page'] is None:
+            report['notes_page'] = shard['notes_page']
+        stats['hits'] += shard['hits']
+        stats['misses'] += shard['misses']
+
+    return results, stats
@@ -0,0 +1,90 @@
+import re
+
+import pandas as pd
+
+from cell_parser import parse_numeric
+from line_items import TAXONOMY, match_line_items
+
+# One amount as printed: "388,688.9", "(92,232.1)", "-45.5", "(812)", or a dash for nil.
+# Amounts carry separators, decimals or brackets, so a bare "5" is a note number.
+AMOUNT_TOKEN = re.compile(
+    r'^(?:-?\d{1,3}(?:,\d{3})+(?:\.\d+)?|-?\d+\.\d+|\(\d{1,3}(?:,\d{3})*(?:\.\d+)?\)|[-–—])$'
+)
+# A note reference column entry: "5", "12", "5(a)"
+NOTE_TOKEN = re.compile(r'^\d{1,2}(?:\([a-z]\))?$')
+
+# Page text prints EBITDA spelled out or as the bare acronym; statement tables
+# always spell it out, so only the text reader accepts either on its own
+TEXT_TAXONOMY = {
+    **TAXONOMY,
+    'income_statement': {
+        **TAXONOMY['income_statement'],
+        'EBITDA': {'synonyms': ['ebitda', 'earnings before interest']},
+    },
+}
+
+
+def tokenize(text):
+    """Split page text once into (label, note, amount tokens) per line
+
+    Amounts are read right-to-left off the end of each line, and a note number
+    is the word just before them. A line with a label but no amounts is carried
+    onto the next line, note and all, so labels (and rows whose amounts wrap)
+    over two lines are joined.
+    """
+    lines = []
+    carried, carried_note = '', ''
+    for line in (text or '').split('\n'):
+        words = line.split()
+        split = len(words)
+        while split > 0 and AMOUNT_TOKEN.match(words[split - 1]):
+            split -= 1
+        amounts = words[split:]
+        label_words = words[:split]
+
+        note = ''
+        if len(label_words) > 1 and NOTE_TOKEN.match(label_words[-1]):
+            note = label_words.pop()
+
+        label = ' '.join(label_words)
+        if not amounts:
+            carried, carried_note = label, note
+            continue
+        if carried:
+            label = f"{carried} {label}".strip()
+            note = note or carried_note
+            carried, carried_note = '', ''
+        lines.append((label, note, amounts))
+    return lines
+
+
+def resolve_metrics(lines, statement='income_statement', min_amounts=1, taxonomy=TEXT_TAXONOMY, parse=True):
+    """Map tokenized lines to canonical metrics in a single pass over the token stream
+
+    Returns {metric: (label, note, amounts)} using the first matching line with at
+    least `min_amounts` amounts, with amounts parsed to floats, or as printed
+    when `parse` is False.
+    """
+    if not lines:
+        return {}
+    frame = pd.DataFrame(lines, columns=['label', 'note', 'amounts'])
+    frame['metric'] = match_line_items(frame['label'], statement, taxonomy)
+    frame = frame[frame['metric'].notna() & (frame['amounts'].str.len() >= min_amounts)]
+    frame = frame.drop_duplicates('metric')
+    if not parse:
+        return {row.metric: (row.label, row.note, row.amounts) for row in frame.itertuples()}
+
+    # Parse every amount on the matched lines together
+    flat = frame['amounts'].explode()
+    values = parse_numeric(flat).groupby(level=0).agg(list) if len(flat) else pd.Series(dtype=object)
+
+    return {
+        row.metric: (row.label, row.note, values[idx])
+        for idx, row in frame.iterrows()
+    }
+
+
+def parse_page_text(text, statement='income_statement', min_amounts=1):
+    """{metric: first amount} for one page of statement text"""
+    resolved = resolve_metrics(tokenize(text), statement, min_amounts)
+    return {metric: amounts[0] for metric, (label, note, amounts) in resolved.items()}
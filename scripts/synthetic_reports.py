@@ -0,0 +1,351 @@
+import argparse
+import os
+import random
+import zlib
+
+# A4 in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+# Helvetica advance widths (1/1000 em) for the characters amounts are made of;
+# everything else is approximated, which is close enough for right-aligning numbers
+_CHAR_WIDTHS = {
+    **{d: 556 for d in '0123456789'},
+    ',': 278, '.': 278, '(': 333, ')': 333, '-': 333, ' ': 278,
+}
+
+LAYOUTS = ('ruled', 'whitespace')
+NUMBER_FORMATS = ('brackets', 'minus', 'thousands')
+ENTITY_SETS = {
+    'group_company': ('GROUP', 'COMPANY'),
+    'group': ('GROUP',),
+}
+
+STATEMENT_HEADINGS = {
+    'income_statement': 'CONSOLIDATED STATEMENT OF COMPREHENSIVE INCOME',
+    'balance_sheet': 'CONSOLIDATED STATEMENT OF FINANCIAL POSITION',
+    'cash_flow': 'CONSOLIDATED STATEMENT OF CASH FLOWS',
+}
+
+# (label, note, share of the statement's base amount); a share of None is a heading row without amounts
+STATEMENT_LINES = {
+    'income_statement': [
+        ('Revenue from contracts with customers', '5', 0.97),
+        ('Other revenue', '6', 0.03),
+        ('Total revenue', '', 1.0),
+        ('Direct costs', '7', -0.33),
+        ('Expected credit losses on financial assets', '8', -0.01),
+        ('Other expenses', '9', -0.21),
+        ('Earnings before interest, taxes, depreciation and amortisation (EBITDA)', '', 0.45),
+        ('Depreciation and amortisation', '10', -0.17),
+        ('Operating profit', '', 0.28),
+        ('Finance income', '11', 0.01),
+        ('Finance costs', '12', -0.04),
+        ('Share of loss of associate and joint venture', '', -0.0),
+        ('Profit before income tax', '', 0.25),
+        ('Income tax expense', '13', -0.10),
+        ('Profit for the year', '', 0.15),
+        ('Attributable to:', None, None),
+        ('Owners of the parent', '', 0.16),
+        ('Non-controlling interests', '', -0.01),
+    ],
+    'balance_sheet': [
+        ('Property and equipment', '14', 0.45),
+        ('Intangible assets', '15', 0.12),
+        ('Inventories', '16', 0.01),
+        ('Trade and other receivables', '17', 0.09),
+        ('Cash and cash equivalents', '18', 0.05),
+        ('Total assets', '', 1.0),
+        ('Share capital', '19', 0.01),
+        ('Retained earnings', '', 0.40),
+        ('Total equity', '', 0.41),
+        ('Borrowings', '20', 0.22),
+        ('Trade and other payables', '21', 0.30),
+        ('Total liabilities', '', 0.59),
+        ('Total equity and liabilities', '', 1.0),
+    ],
+    'cash_flow': [
+        ('Cash generated from operations', '22', 0.52),
+        ('Income tax paid', '', -0.12),
+        ('Net cash generated from operating activities', '', 0.40),
+        ('Purchase of property and equipment', '', -0.24),
+        ('Net cash used in investing activities', '', -0.27),
+        ('Dividends paid', '', -0.14),
+        ('Repayment of borrowings', '', -0.05),
+        ('Net cash used in financing activities', '', -0.19),
+        ('Net decrease in cash and cash equivalents', '', -0.06),
+    ],
+}
+
+FILLER_SECTIONS = [
+    'Chairman\'s Statement', 'Chief Executive Officer\'s Review', 'Sustainability Report',
+    'Corporate Governance', 'Risk Management', 'Directors\' Remuneration Report',
+    'Our Business Model', 'Customer Experience', 'Network and Technology', 'Our People',
+]
+FILLER_WORDS = (
+    'the group continued to invest in network capacity customer growth digital financial services '
+    'across the region while maintaining disciplined capital allocation and strong governance '
+    'our strategy focuses on connectivity enterprise solutions and sustainable long term value '
+    'for shareholders customers partners and the communities in which we operate during the year'
+).split()
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def text_width(text, size):
+    return sum(_CHAR_WIDTHS.get(c, 520) for c in text) * size / 1000
+
+
+class PdfWriter:
+    """Minimal PDF 1.4 writer: Helvetica text, stroked lines and an optional outline"""
+
+    def __init__(self):
+        self.objects = []
+        self.pages = []
+        self.outline = []
+        self.pages_id = self._reserve()
+        self.font_id = self._add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self.bold_id = self._add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def _add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    def add_page(self, operators):
+        """Add a page from a list of content-stream operator strings; returns its 0-indexed number"""
+        content = zlib.compress('\n'.join(operators).encode('cp1252', 'replace'))
+        content_id = self._add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        page_id = self._add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> >>"
+            % (self.pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id, self.font_id, self.bold_id)
+        )
+        self.pages.append(page_id)
+        return len(self.pages) - 1
+
+    def add_bookmark(self, title, page_num):
+        self.outline.append((title, page_num))
+
+    def _outline_root(self):
+        if not self.outline:
+            return None
+        root_id = self._reserve()
+        item_ids = [self._reserve() for _ in self.outline]
+        for i, (title, page_num) in enumerate(self.outline):
+            links = b""
+            if i > 0:
+                links += b" /Prev %d 0 R" % item_ids[i - 1]
+            if i + 1 < len(item_ids):
+                links += b" /Next %d 0 R" % item_ids[i + 1]
+            self.objects[item_ids[i] - 1] = (
+                b"<< /Title (%s) /Parent %d 0 R /Dest [%d 0 R /XYZ 0 %d 0]%s >>"
+                % (_escape(title).encode('cp1252'), root_id, self.pages[page_num], PAGE_HEIGHT, links)
+            )
+        self.objects[root_id - 1] = b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>" % (
+            item_ids[0], item_ids[-1], len(item_ids)
+        )
+        return root_id
+
+    def write(self, path):
+        kids = b" ".join(b"%d 0 R" % p for p in self.pages)
+        self.objects[self.pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages))
+        outline_id = self._outline_root()
+        catalog = b"<< /Type /Catalog /Pages %d 0 R" % self.pages_id
+        if outline_id:
+            catalog += b" /Outlines %d 0 R /PageMode /UseOutlines" % outline_id
+        catalog_id = self._add(catalog + b" >>")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self.objects) + 1, catalog_id, xref
+        )
+        with open(path, 'wb') as f:
+            f.write(out)
+
+
+def _text(x, y, text, size=9, bold=False):
+    return f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+
+
+def _line(x0, y0, x1, y1):
+    return f"{x0:.2f} {y0:.2f} m {x1:.2f} {y1:.2f} l S"
+
+
+def format_amount(value, number_format):
+    """Print an amount the way the reports do, in one of NUMBER_FORMATS"""
+    if round(value, 1) == 0:
+        return '-'
+    if number_format == 'thousands':
+        text = f"{abs(value):,.0f}"
+    else:
+        text = f"{abs(value):,.1f}"
+    if value >= 0:
+        return text
+    return f"-{text}" if number_format == 'minus' else f"({text})"
+
+
+def filler_page(rng, title, page_label):
+    ops = [_text(50, 800, title, 16, bold=True), _text(480, 820, page_label, 8)]
+    y = 770
+    while y > 60:
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(12, 16))]
+        ops.append(_text(50, y, ' '.join(words).capitalize(), 9))
+        y -= 13
+    return ops
+
+
+def statement_page(rng, statement, year, base, entities, layout, number_format, page_label):
+    """Operators for one statement page: heading, column headers and the line-item table"""
+    ops = [
+        _text(50, 800, STATEMENT_HEADINGS[statement], 12, bold=True),
+        _text(50, 784, f"For the year ended 31 March {year}", 9),
+        _text(480, 820, page_label, 8),
+    ]
+
+    label_x, note_x, amounts_x, right = 50, 300, 335, 560
+    column_width = (right - amounts_x) / (2 * len(entities))
+    columns = [
+        (entity, fy, amounts_x + (i * 2 + j) * column_width)
+        for i, entity in enumerate(entities)
+        for j, fy in enumerate((year, year - 1))
+    ]
+    # Each entity's figures are a slightly different scale of the same statement
+    scales = {entity: 1.0 if i == 0 else rng.uniform(0.8, 0.95) for i, entity in enumerate(entities)}
+    growth = rng.uniform(0.85, 0.97)
+
+    row_height = 16
+    top = 760
+    header_rows = [
+        [('', label_x), ('', note_x)] + [(entity if fy == year else '', x) for entity, fy, x in columns],
+        [('', label_x), ('Notes', note_x)] + [(f"{fy} KShs M", x) for entity, fy, x in columns],
+    ]
+    body_rows = []
+    for label, note, share in STATEMENT_LINES[statement]:
+        cells = [(label, label_x), (note or '', note_x)]
+        for entity, fy, x in columns:
+            if share is None:
+                cells.append(('', x))
+                continue
+            value = base * share * scales[entity] * (1 if fy == year else growth)
+            value *= rng.uniform(0.98, 1.02)
+            cells.append((format_amount(value, number_format), x))
+        body_rows.append(cells)
+
+    rows = header_rows + body_rows
+    for r, cells in enumerate(rows):
+        baseline = top - r * row_height - 11
+        bold = r < len(header_rows)
+        for c, (text, x) in enumerate(cells):
+            if not text:
+                continue
+            if c >= 2 and r > 0:
+                # Amounts and year headers are right-aligned in their column
+                x = x + column_width - 4 - text_width(text, 8)
+            ops.append(_text(x + (2 if c < 2 else 0), baseline, text, 8, bold=bold))
+
+    if layout == 'ruled':
+        ops.append("0.4 w")
+        bottom = top - len(rows) * row_height
+        for r in range(len(rows) + 1):
+            ops.append(_line(label_x, top - r * row_height, right, top - r * row_height))
+        for x in [label_x, note_x, amounts_x] + [x + column_width for _, _, x in columns]:
+            ops.append(_line(x, top, x, bottom))
+    return ops
+
+
+def make_report(path, year=2025, pages=250, statement_pages=None, layout='ruled',
+                entities='group_company', number_format='brackets', outline=False, seed=0):
+    """Write one annual-report-like PDF
+
+    Statements default to pages just past two thirds of the report, in the usual
+    order, followed by the notes. Returns {statement: 0-indexed page}.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}")
+    if number_format not in NUMBER_FORMATS:
+        raise ValueError(f"number_format must be one of {NUMBER_FORMATS}")
+
+    rng = random.Random(seed)
+    if statement_pages is None:
+        first = max(int(pages * 0.7), 0)
+        statement_pages = {statement: first + i for i, statement in enumerate(STATEMENT_HEADINGS)}
+    if max(statement_pages.values()) + 1 >= pages:
+        raise ValueError(f"{pages} pages leave no room for statements at {statement_pages}")
+    notes_page = max(statement_pages.values()) + 1
+
+    base = rng.uniform(50_000, 500_000)
+    by_page = {page_num: statement for statement, page_num in statement_pages.items()}
+    writer = PdfWriter()
+    for page_num in range(pages):
+        label = f"Annual Report {year} | {page_num + 1}"
+        if page_num in by_page:
+            ops = statement_page(rng, by_page[page_num], year, base, ENTITY_SETS[entities],
+                                 layout, number_format, label)
+        elif page_num == notes_page:
+            ops = filler_page(rng, 'NOTES TO THE FINANCIAL STATEMENTS', label)
+        else:
+            ops = filler_page(rng, FILLER_SECTIONS[page_num % len(FILLER_SECTIONS)], label)
+        writer.add_page(ops)
+
+    if outline:
+        for statement, page_num in sorted(statement_pages.items(), key=lambda item: item[1]):
+            writer.add_bookmark(STATEMENT_HEADINGS[statement].title(), page_num)
+    writer.write(path)
+    return statement_pages
+
+
+def generate_reports(out_dir, count, pages=250, layout='ruled', entities='group_company',
+                     number_format='brackets', outline=False, first_year=2015, seed=0):
+    """Write `count` distinct reports into out_dir, reusing files already there
+
+    Every report gets its own seed so none share a content hash. The options
+    are part of each file name, so a file is only reused by a run that would
+    generate the same report.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    variant = f"{pages}p {layout} {entities} {number_format}{' outline' if outline else ''} seed{seed}"
+    paths = []
+    for i in range(count):
+        year = first_year + i % 11
+        path = os.path.join(out_dir, f"Synthetic {year} Report {i:04d} {variant}.pdf")
+        if not os.path.exists(path):
+            make_report(path, year=year, pages=pages, layout=layout, entities=entities,
+                        number_format=number_format, outline=outline, seed=seed * 100_003 + i)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic annual-report PDFs")
+    parser.add_argument('out_dir')
+    parser.add_argument('--count', type=int, default=3)
+    parser.add_argument('--pages', type=int, default=250)
+    parser.add_argument('--layout', choices=LAYOUTS, default='ruled')
+    parser.add_argument('--entities', choices=list(ENTITY_SETS), default='group_company')
+    parser.add_argument('--number-format', choices=NUMBER_FORMATS, default='brackets')
+    parser.add_argument('--outline', action='store_true', help="add bookmarks for the statements")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_reports(args.out_dir, args.count, args.pages, args.layout, args.entities,
+                             args.number_format, args.outline, seed=args.seed)
+    print(f"✓ {len(paths)} reports in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
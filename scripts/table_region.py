@@ -0,0 +1,129 @@
+import json
+import os
+import re
+
+from statement_locator import STATEMENT_TITLES, manifest_path
+from statement_text import AMOUNT_TOKEN, NOTE_TOKEN
+
+# Stored next to the page manifest so a layout can be retuned without code changes
+profiles_path = os.path.join(os.path.dirname(manifest_path), "table_settings.json")
+
+# pdfplumber table_settings per statement layout. Ruled statements have their
+# grid drawn; whitespace statements only line up, so columns come from word
+# alignment, and only edges shared by several rows count, which keeps long
+# labels in one cell.
+TABLE_PROFILES = {
+    'ruled': {
+        'vertical_strategy': 'lines',
+        'horizontal_strategy': 'lines',
+    },
+    'whitespace': {
+        'vertical_strategy': 'text',
+        'horizontal_strategy': 'text',
+        'min_words_vertical': 6,
+        'min_words_horizontal': 1,
+    },
+}
+
+# Rows ending each statement; the table region runs from the title to the lowest one found
+STATEMENT_TOTALS = {
+    'income_statement': [
+        'profit for the year',
+        'total comprehensive income',
+        'earnings per share',
+    ],
+    'balance_sheet': [
+        'total equity and liabilities',
+        'total liabilities',
+        'total equity',
+    ],
+    'cash_flow': [
+        'cash and cash equivalents at',
+        'net increase in cash',
+        'net decrease in cash',
+        'net cash used in financing',
+        'net cash from financing',
+    ],
+}
+
+# Ruling lines needed before a region is treated as a drawn grid
+MIN_RULED_EDGES = 4
+MARGIN = 2
+# How far below the last totals row its closing rule may sit
+ROW_SLACK = 12
+
+
+def load_profiles(path=profiles_path):
+    """Table settings per layout: the saved profiles over the defaults
+
+    Only reads; without a saved file the defaults above apply as they are.
+    """
+    profiles = {layout: dict(settings) for layout, settings in TABLE_PROFILES.items()}
+    if os.path.exists(path):
+        with open(path) as f:
+            for layout, settings in json.load(f).items():
+                profiles.setdefault(layout, {}).update(settings)
+    return profiles
+
+
+def _pattern(phrases):
+    return '|'.join(re.escape(phrase).replace(r'\ ', r'\s+') for phrase in phrases)
+
+
+def statement_bbox(analysis, statement):
+    """(x0, top, x1, bottom) from below the statement's title to its lowest totals row
+
+    `analysis` is the page's PageAnalysis. Either end falls back to the page
+    edge when its text is not on the page.
+    """
+    x0, top, x1, bottom = analysis.bbox
+    titles = analysis.search(_pattern(STATEMENT_TITLES[statement]), case=False)
+    totals = analysis.search(_pattern(STATEMENT_TOTALS[statement]), case=False)
+
+    region_top = min(match['bottom'] for match in titles) + MARGIN if titles else top
+    below = [match for match in totals if match['top'] > region_top]
+    if not below:
+        return [x0, region_top, x1, bottom]
+    last_row = max(match['bottom'] for match in below)
+    # A ruled table closes its last row with a line just below the text
+    rules = [edge['top'] for edge in analysis.horizontal_edges if last_row <= edge['top'] <= last_row + ROW_SLACK]
+    region_bottom = min(min(rules, default=last_row) + MARGIN, bottom)
+    return [x0, region_top, x1, region_bottom]
+
+
+def detect_layout(region):
+    """'ruled' when the region has a drawn grid, else 'whitespace'"""
+    if len(region.horizontal_edges) >= MIN_RULED_EDGES and len(region.vertical_edges) >= 2:
+        return 'ruled'
+    return 'whitespace'
+
+
+def locate_region(analysis, statement):
+    """Manifest entry for one statement page: its table bbox and layout"""
+    bbox = statement_bbox(analysis, statement)
+    return {'bbox': [round(v, 2) for v in bbox], 'layout': detect_layout(analysis.crop(bbox))}
+
+
+def _with_notes_column(rows):
+    """Rows with an empty notes column inserted where column 1 holds amounts
+
+    A text-strategy table only gets a notes column when enough rows cite a
+    note; downstream, column 1 is always the note and amounts start at column 2.
+    """
+    column = [row[1].strip() for row in rows if len(row) > 1 and row[1]]
+    if not any(AMOUNT_TOKEN.match(cell) and not NOTE_TOKEN.match(cell) and re.search(r'[,()]', cell)
+               for cell in column):
+        return rows
+    return [row[:1] + [''] + row[1:] for row in rows]
+
+
+def region_table(analysis, region, profiles=None):
+    """Rows of the statement table inside `region` of an analysed page, or [] if none is found"""
+    settings = (profiles or TABLE_PROFILES)[region['layout']]
+    table = analysis.crop(region['bbox']).table(settings)
+    if not table:
+        return []
+    rows = [row for row in table if any(cell and cell.strip() for cell in row)]
+    if settings.get('vertical_strategy') == 'text':
+        rows = _with_notes_column(rows)
+    return rows
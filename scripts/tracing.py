@@ -0,0 +1,202 @@
+import argparse
+import cProfile
+import glob
+import itertools
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+# Tracing is switched on by pointing PIPELINE_TRACE at a directory. The setting is
+# read from the environment so it reaches stage subprocesses and pool workers.
+# PIPELINE_PROFILE=1 additionally runs cProfile around the pdfplumber calls.
+TRACE_ENV = "PIPELINE_TRACE"
+PROFILE_ENV = "PIPELINE_PROFILE"
+
+_lock = threading.Lock()
+_profile_ids = itertools.count()
+
+
+def trace_dir():
+    return os.environ.get(TRACE_ENV) or None
+
+
+def enabled():
+    return trace_dir() is not None
+
+
+def profiling():
+    return enabled() and os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def current_rss_kb():
+    """Resident set size of this process right now (Linux), else None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def record(name, cat, start_us, wall_us, cpu_us, peak_kb, rss_kb=None, pid=None, tid=None, **args):
+    """Append one finished event to this process's trace file"""
+    directory = trace_dir()
+    if directory is None:
+        return
+    event = {
+        "name": name,
+        "cat": cat,
+        "pid": pid or os.getpid(),
+        "tid": tid if tid is not None else threading.get_native_id(),
+        "ts": start_us,
+        "dur": wall_us,
+        "cpu": cpu_us,
+        "peak_rss_kb": peak_kb,
+        "rss_kb": rss_kb,
+        "args": args,
+    }
+    # Each process appends whole lines to its own file, so workers never interleave
+    os.makedirs(directory, exist_ok=True)
+    line = json.dumps(event) + "\n"
+    with _lock, open(os.path.join(directory, f"events-{os.getpid()}.jsonl"), "a") as f:
+        f.write(line)
+
+
+@contextmanager
+def span(name, cat="step", **args):
+    """Time a block: wall time, this thread's CPU time and the process's peak RSS
+
+    Costs one environment lookup when tracing is off.
+    """
+    if not enabled():
+        yield
+        return
+    start_us = time.time_ns() // 1000
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        record(
+            name, cat, start_us,
+            wall_us=int((time.perf_counter() - wall) * 1e6),
+            cpu_us=int((time.thread_time() - cpu) * 1e6),
+            peak_kb=peak_rss_kb(),
+            rss_kb=current_rss_kb(),
+            **args
+        )
+
+
+@contextmanager
+def profiled(name, **args):
+    """Span that also runs cProfile when PIPELINE_PROFILE is set
+
+    Profiles land in <trace dir>/profiles/<name>-<pid>-<n>.prof for pstats/snakeviz.
+    """
+    if not profiling():
+        with span(name, "pdf", **args):
+            yield
+        return
+
+    profile_dir = os.path.join(trace_dir(), "profiles")
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{name}-{os.getpid()}-{next(_profile_ids)}.prof")
+    profiler = cProfile.Profile()
+    with span(name, "pdf", profile=path, **args):
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+
+
+def load_events(directory):
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, "events-*.jsonl"))):
+        with open(path) as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    return sorted(events, key=lambda e: e["ts"])
+
+
+def summarize(events):
+    """Totals per (category, name), slowest first"""
+    totals = {}
+    for event in events:
+        key = (event["cat"], event["name"])
+        entry = totals.setdefault(key, {
+            "cat": event["cat"], "name": event["name"], "count": 0,
+            "wall_us": 0, "cpu_us": 0, "max_wall_us": 0, "peak_rss_kb": 0,
+        })
+        entry["count"] += 1
+        entry["wall_us"] += event["dur"]
+        entry["cpu_us"] += event["cpu"] or 0
+        entry["max_wall_us"] = max(entry["max_wall_us"], event["dur"])
+        entry["peak_rss_kb"] = max(entry["peak_rss_kb"], event["peak_rss_kb"] or 0)
+    return sorted(totals.values(), key=lambda e: e["wall_us"], reverse=True)
+
+
+def chrome_trace(events):
+    """Chrome trace-event format, viewable in chrome://tracing or Perfetto"""
+    trace_events = []
+    for event in events:
+        trace_events.append({
+            "name": event["name"],
+            "cat": event["cat"],
+            "ph": "X",
+            "ts": event["ts"],
+            "dur": event["dur"],
+            "pid": event["pid"],
+            "tid": event["tid"],
+            "args": dict(event["args"], cpu_us=event["cpu"], peak_rss_kb=event["peak_rss_kb"],
+                         rss_kb=event["rss_kb"]),
+        })
+        if event["rss_kb"] is not None:
+            trace_events.append({
+                "name": "rss_kb", "ph": "C", "ts": event["ts"] + event["dur"],
+                "pid": event["pid"], "args": {"rss_kb": event["rss_kb"]},
+            })
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def export(directory, json_path=None, chrome_path=None):
+    """Write the merged trace as JSON (events and totals) and as a Chrome trace"""
+    events = load_events(directory)
+    json_path = json_path or os.path.join(directory, "trace.json")
+    chrome_path = chrome_path or os.path.join(directory, "trace.chrome.json")
+    with open(json_path, "w") as f:
+        json.dump({"events": events, "summary": summarize(events)}, f, indent=1)
+    with open(chrome_path, "w") as f:
+        json.dump(chrome_trace(events), f)
+    return events, json_path, chrome_path
+
+
+def print_summary(events, limit=15):
+    print(f"{'category':<10} {'name':<32} {'count':>6} {'wall s':>9} {'cpu s':>9} {'max ms':>9} {'peak MB':>8}")
+    for entry in summarize(events)[:limit]:
+        print(f"{entry['cat']:<10} {entry['name'][:32]:<32} {entry['count']:>6} "
+              f"{entry['wall_us'] / 1e6:>9.2f} {entry['cpu_us'] / 1e6:>9.2f} "
+              f"{entry['max_wall_us'] / 1e3:>9.1f} {entry['peak_rss_kb'] / 1024:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a trace directory into JSON and Chrome trace files")
+    parser.add_argument('directory', help=f"directory the run wrote to (the {TRACE_ENV} setting)")
+    parser.add_argument('--json', default=None, help="summary JSON path (default: <directory>/trace.json)")
+    parser.add_argument('--chrome', default=None, help="Chrome trace path (default: <directory>/trace.chrome.json)")
+    args = parser.parse_args()
+
+    events, json_path, chrome_path = export(args.directory, args.json, args.chrome)
+    print_summary(events)
+    print(f"\n✓ {len(events)} events → {json_path}, {chrome_path}")
+
+
+if __name__ == "__main__":
+    main()
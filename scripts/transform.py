@@ -1,43 +1,25 @@
-import pandas as pd
 import re
 import os
 
-extracted_dir = "data/extracted"
+from batch_extract import dataset_path, load_statement
+
 processed_dir = "data/processed"
 
 # Create processed directory
 os.makedirs(processed_dir, exist_ok=True)
 
-def clean_value(value):
-    """Clean financial values - remove commas, handle parentheses for negatives"""
-    if pd.isna(value) or value == '':
-        return None
-    
-    # Convert to string
-    value = str(value).strip()
-    
-    # Remove commas
-    value = value.replace(',', '')
-    
-    # Handle parentheses (negative numbers)
-    if '(' in value and ')' in value:
-        value = '-' + value.replace('(', '').replace(')', '')
-    
-    try:
-        return float(value)
-    except:
-        return None
-
 def process_income_statement(year):
     """Process income statement for a given year"""
-    file_path = os.path.join(extracted_dir, f"income_statement_{year}.csv")
-    
-    if not os.path.exists(file_path):
-        print(f"File not found: {file_path}")
+    if not os.path.exists(dataset_path):
+        print(f"File not found: {dataset_path}")
         return None
     
-    # Read the raw CSV
-    df = pd.read_csv(file_path, header=None)
+    # Read the raw extracted statement
+    try:
+        df = load_statement("income_statement", year)
+    except FileNotFoundError as e:
+        print(str(e))
+        return None
     
     print(f"\n{'='*70}")
     print(f"Processing Income Statement {year}")
@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from job_queue import DONE, FAILED, PENDING, RUNNING, DirectoryJobQueue, SQLiteJobQueue
+
+LEASE = 0.2
+
+
+@pytest.fixture(params=['sqlite', 'dir'])
+def queue_url(request, tmp_path):
+    if request.param == 'sqlite':
+        return f"sqlite:///{tmp_path / 'queue.sqlite'}"
+    return f"dir:///{tmp_path / 'queue'}"
+
+
+def open_url(url, max_attempts=3):
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):], max_attempts=max_attempts)
+    return DirectoryJobQueue(url[len("dir:///"):], max_attempts=max_attempts)
+
+
+def state_counts(queue, kind='extract'):
+    return queue.counts().get(kind, dict.fromkeys((PENDING, RUNNING, DONE, FAILED), 0))
+
+
+def test_live_lease_is_not_claimed_twice(queue_url):
+    a, b = open_url(queue_url), open_url(queue_url)
+    assert a.enqueue('extract', 'job-1', {'n': 1})
+    assert not b.enqueue('extract', 'job-1', {'n': 1})
+
+    job = a.claim('worker-a', lease_seconds=60)
+    assert job['key'] == 'job-1' and job['attempts'] == 1
+    assert b.claim('worker-b', lease_seconds=60) is None
+    assert not b.enqueue('extract', 'job-1', {'n': 1})
+
+    assert a.complete(job, {'ok': True})
+    assert b.results('extract') == {'job-1': {'ok': True}}
+    assert state_counts(b)[DONE] == 1
+
+
+def test_heartbeat_keeps_the_job(queue_url):
+    a, b = open_url(queue_url), open_url(queue_url)
+    a.enqueue('extract', 'job-1', {})
+    job = a.claim('worker-a', lease_seconds=LEASE)
+    for _ in range(3):
+        time.sleep(LEASE / 2)
+        assert a.heartbeat(job, lease_seconds=LEASE)
+        assert b.claim('worker-b', lease_seconds=LEASE) is None
+    assert a.complete(job, 'a')
+    assert b.results('extract') == {'job-1': 'a'}
+
+
+def test_expired_lease_moves_to_another_worker(queue_url):
+    a, b = open_url(queue_url), open_url(queue_url)
+    a.enqueue('extract', 'job-1', {})
+    stale = a.claim('worker-a', lease_seconds=LEASE)
+    time.sleep(LEASE * 1.5)
+
+    taken = b.claim('worker-b', lease_seconds=60)
+    assert taken is not None and taken['key'] == 'job-1' and taken['attempts'] == 2
+
+    # The first worker has lost the job: it can neither renew nor finish it
+    assert not a.heartbeat(stale, lease_seconds=60)
+    assert not a.complete(stale, 'a')
+    assert not a.fail(stale, 'a gave up')
+
+    assert b.complete(taken, 'b')
+    assert a.results('extract') == {'job-1': 'b'}
+    assert state_counts(a) == {PENDING: 0, RUNNING: 0, DONE: 1, FAILED: 0}
+
+
+def test_job_fails_after_repeated_expiry(queue_url):
+    queue = open_url(queue_url, max_attempts=2)
+    queue.enqueue('extract', 'job-1', {})
+    for attempt in (1, 2):
+        job = queue.claim(f'worker-{attempt}', lease_seconds=LEASE)
+        assert job['attempts'] == attempt
+        time.sleep(LEASE * 1.5)
+    assert queue.claim('worker-3', lease_seconds=LEASE) is None
+    assert state_counts(queue)[FAILED] == 1
+
+
+def _race(url, worker, results):
+    """Claim and complete jobs, sometimes stalling past the lease, until none are left"""
+    queue = open_url(url, max_attempts=100)
+    completed = []
+    idle = 0
+    while idle < 10:
+        job = queue.claim(worker, lease_seconds=LEASE)
+        if job is None:
+            idle += 1
+            time.sleep(LEASE / 4)
+            continue
+        idle = 0
+        if zlib.crc32(f"{worker} {job['key']} {job['attempts']}".encode()) % 4 == 0:
+            time.sleep(LEASE * 1.5)  # another worker reclaims this one meanwhile
+        else:
+            queue.heartbeat(job, lease_seconds=LEASE)
+        if queue.complete(job, worker):
+            completed.append((job['key'], job['attempts']))
+    results.put(completed)
+    queue.close()
+
+
+def test_racing_workers_complete_each_job_once(queue_url):
+    queue = open_url(queue_url)
+    keys = [f'job-{i:03d}' for i in range(40)]
+    for key in keys:
+        queue.enqueue('extract', key, {})
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_race, args=(queue_url, f'worker-{i}', results)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    completed = [done for _ in workers for done in results.get(timeout=120)]
+    for worker in workers:
+        worker.join()
+
+    assert sorted(key for key, _ in completed) == keys
+    assert any(attempts > 1 for _, attempts in completed), "no lease expired during the race"
+    assert set(queue.results('extract')) == set(keys)
+    assert state_counts(queue) == {PENDING: 0, RUNNING: 0, DONE: len(keys), FAILED: 0}